@@ -82,6 +82,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'smart_selects',
     'import_export',
     'rest_framework',
@@ -131,10 +132,60 @@ DATABASES = {
         'PASSWORD': env_required('POSTGRES_PASSWORD'),
         'HOST':     os.getenv('POSTGRES_HOST', '127.0.0.1'),
         'PORT':     os.getenv('POSTGRES_PORT', '5432'),
+        # Keep connections open between requests (also in async worker threads)
+        'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
 
+# Cache
+# Catalogue payloads and their version counters live in the cache, so it must be
+# shared by the web workers and the import commands: invalidations bumped by a
+# command have to reach the processes serving pages. Redis (REDIS_URL, set by
+# compose.yml) is the default; without it the database cache is used, never a
+# per-process cache. The table is created by: python manage.py createcachetable
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.getenv('CACHE_TABLE', 'django_cache'),
+        }
+    }
+
+CATALOGUE_CACHE_TIMEOUT = int(os.getenv('CATALOGUE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Stream /catalogue/ section by section by default (?stream=0/1 overrides per request)
+CATALOGUE_STREAMING = env_bool('CATALOGUE_STREAMING', False)
+CATALOGUE_STREAM_CHUNK_SIZE = int(os.getenv('CATALOGUE_STREAM_CHUNK_SIZE', 50))
+
+# Max product tables read at once by the async catalogue view
+CATALOGUE_ASYNC_CONCURRENCY = int(os.getenv('CATALOGUE_ASYNC_CONCURRENCY', 4))
+
+# Vehicle directory snapshot behind the selector APIs (see vehicles/directory.py);
+# keep it on storage shared by all web workers.
+VEHICLE_SNAPSHOT_PATH = Path(os.getenv('VEHICLE_SNAPSHOT_PATH', BASE_DIR / 'var' / 'vehicle_directory.json'))
+VEHICLE_DIRECTORY_CHECK_INTERVAL = float(os.getenv('VEHICLE_DIRECTORY_CHECK_INTERVAL', 5))
+
+# Seconds between checks of ProductVehicle for rows the in-memory fleet index
+# (catalogue.fleet) has not seen yet.
+FLEET_INDEX_CHECK_INTERVAL = float(os.getenv('FLEET_INDEX_CHECK_INTERVAL', 30))
+
+# Seconds between progress lines of the imports (see catalogue/progress.py)
+IMPORT_PROGRESS_INTERVAL = float(os.getenv('IMPORT_PROGRESS_INTERVAL', 2))
+
+# How long browsers and shared caches may reuse /api/vehicles/* responses before revalidating
+VEHICLE_API_MAX_AGE = int(os.getenv('VEHICLE_API_MAX_AGE', 300))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
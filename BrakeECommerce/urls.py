@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from vehicles import views as vehicles_views
 from main import views as main_views
+from catalogue import views as catalogue_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -9,9 +10,24 @@ urlpatterns = [
 
     path('', main_views.home, name='home'),
     path('catalogue/', main_views.catalogue, name='catalogue'),
+    path('catalogue/async/', main_views.catalogue_async, name='catalogue_async'),
 
     path('api/brands/', vehicles_views.get_brands, name='get_brands'),
     path('api/models/', vehicles_views.get_models, name='get_models'),
     path('api/types/', vehicles_views.get_types, name='get_types'),
     path('api/motorbikes/', vehicles_views.get_motorbikes, name='get_motorbikes'),
+    path('api/vehicles/brands/', vehicles_views.vehicle_brands, name='vehicle_brands'),
+    path('api/vehicles/models/', vehicles_views.vehicle_models, name='vehicle_models'),
+    path('api/vehicles/types/', vehicles_views.vehicle_types, name='vehicle_types'),
+    path('api/vehicles/motorbikes/', vehicles_views.vehicle_motorbikes, name='vehicle_motorbikes'),
+    path('api/vehicles/search/', vehicles_views.search_vehicles, name='search_vehicles'),
+    path('api/vehicle-tree/<str:vehicle_type>/', vehicles_views.get_vehicle_tree, name='get_vehicle_tree_latest'),
+    path('api/vehicle-tree/<str:vehicle_type>/<slug:version>/', vehicles_views.get_vehicle_tree, name='get_vehicle_tree'),
+    path('api/catalogue/', catalogue_views.get_catalogue, name='get_catalogue'),
+    path('api/products/lookup/', catalogue_views.lookup_product, name='lookup_product'),
+    path('api/products/search/', catalogue_views.search_catalogue, name='search_catalogue'),
+    path('api/products/cross-reference/', catalogue_views.cross_reference, name='cross_reference'),
+    path('api/products/dimensions/', catalogue_views.find_by_dimension, name='find_by_dimension'),
+    path('api/fleet/parts/', catalogue_views.fleet_parts, name='fleet_parts'),
+    path('api/products/<path:code>/vehicles/', catalogue_views.get_product_vehicles, name='get_product_vehicles'),
 ]
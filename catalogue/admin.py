@@ -66,8 +66,7 @@ class CompatibleVehicleInline(GenericTabularInline):
         elif model_label == "commercialvehicle":
             return f"{v.brand.name} {v.model.name} {getattr(v, 'name', '')} ({ym(getattr(v,'date_start',None), fmt='%Y')}–{ym(getattr(v,'date_end',None), fmt='%Y')}) – {getattr(v,'kw','?')} kW/{getattr(v,'cv','?')} CV".strip()
         elif model_label == "motorbike":
-            years = list(v.years.values_list('value', flat=True))
-            years_txt = f" ({min(years)}–{max(years)})" if years else ""
+            years_txt = f" ({v.year_from}–{v.year_to})" if v.year_from else ""
             return f"{v.brand.name} {v.model.name} {v.displacement}cc{years_txt}"
 
         parts = []
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CatalogueConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'catalogue'
+
+    def ready(self):
+        from catalogue.signals import connect_signals
+        connect_signals()
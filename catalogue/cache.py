@@ -0,0 +1,153 @@
+# catalogue/cache.py
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from catalogue.facets import compute_facets
+from catalogue.fitment import resolve_fitment, aresolve_fitment
+from catalogue.models import VehicleProfile
+
+# Bumped on any product change and at the end of every bulk import.
+CATALOGUE_VERSION_KEY = "catalogue:version"
+# Bumped when a vehicle's ProductVehicle rows change.
+VEHICLE_VERSION_KEY = "catalogue:vehicle-version:{ct}:{id}"
+# Bumped whenever fitment profiles are rebuilt.
+PROFILES_VERSION_KEY = "catalogue:profiles-version"
+# (profile id, digest) of one vehicle, or () when it has none.
+VEHICLE_PROFILE_KEY = "catalogue:vehicle-profile:{version}"
+# Payloads are never deleted, only orphaned: a new version means a new key.
+PAYLOAD_KEY = "catalogue:payload:{version}"
+# Facet counts live and expire with the payload of the same version.
+FACETS_KEY = "catalogue:facets:{version}"
+
+
+def _ct_id(vehicle_ct) -> int:
+    return getattr(vehicle_ct, "pk", vehicle_ct)
+
+
+def _get_version(key: str) -> int:
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1, so an evicted counter never
+        # comes back to a value an older payload was stored under.
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns() // 1000, timeout=None)
+
+
+def catalogue_version() -> int:
+    return _get_version(CATALOGUE_VERSION_KEY)
+
+
+def vehicle_version(vehicle_ct, vehicle_id) -> int:
+    return _get_version(VEHICLE_VERSION_KEY.format(ct=_ct_id(vehicle_ct), id=vehicle_id))
+
+
+def vehicle_profile(vehicle_ct, vehicle_id) -> tuple[int, str] | None:
+    """
+    (profile id, digest) of the vehicle's FitmentProfile, or None; cached until its
+    fitments change or the profiles are rebuilt.
+    """
+    ct = _ct_id(vehicle_ct)
+    version = f"{_get_version(PROFILES_VERSION_KEY)}.{ct}.{vehicle_id}.{vehicle_version(ct, vehicle_id)}"
+    key = VEHICLE_PROFILE_KEY.format(version=version)
+    profile = cache.get(key)
+    if profile is None:
+        row = VehicleProfile.objects.filter(vehicle_ct_id=ct, vehicle_id=vehicle_id) \
+            .values_list("profile_id", "profile__digest").first()
+        profile = tuple(row) if row else ()
+        cache.set(key, profile, timeout=_payload_timeout())
+    return tuple(profile) or None
+
+
+def _resolve_version(vehicle_ct, vehicle_id, year=None) -> tuple[str, int | None]:
+    profile = vehicle_profile(vehicle_ct, vehicle_id)
+    if profile is not None:
+        # profiles only group vehicles without year-limited fitments
+        profile_id, digest = profile
+        return f"{catalogue_version()}.p{digest}", profile_id
+    ct = _ct_id(vehicle_ct)
+    version = f"{catalogue_version()}.{ct}.{vehicle_id}.{vehicle_version(ct, vehicle_id)}"
+    if year is not None:
+        version += f".y{year}"
+    return version, None
+
+
+def fitment_version(vehicle_ct, vehicle_id, year=None) -> str:
+    """
+    Opaque version of everything the catalogue shows for one vehicle (and model
+    year, for motorbikes). Changes whenever its fitments or any product change.
+    Vehicles sharing a fitment profile share the version, and with it every
+    cached payload.
+    """
+    return _resolve_version(vehicle_ct, vehicle_id, year)[0]
+
+
+def _payload_timeout() -> int:
+    return getattr(settings, "CATALOGUE_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def get_fitment(vehicle_ct, vehicle_id, year=None) -> list[tuple[str, list]]:
+    """
+    Cached resolve_fitment(): [(title, items), ...] for one vehicle.
+    """
+    version, profile_id = _resolve_version(vehicle_ct, vehicle_id, year)
+    key = PAYLOAD_KEY.format(version=version)
+    products = cache.get(key)
+    if products is None:
+        products = resolve_fitment(vehicle_ct, vehicle_id, profile_id=profile_id, year=year)
+        cache.set(key, products, timeout=_payload_timeout())
+    return products
+
+
+def get_facets(vehicle_ct, vehicle_id, year=None) -> dict[str, dict[str, int]]:
+    """
+    Cached compute_facets(), keyed on the same fitment version as get_fitment().
+    """
+    version, profile_id = _resolve_version(vehicle_ct, vehicle_id, year)
+    key = FACETS_KEY.format(version=version)
+    counts = cache.get(key)
+    if counts is None:
+        counts = compute_facets(vehicle_ct, vehicle_id, profile_id=profile_id, year=year)
+        cache.set(key, counts, timeout=_payload_timeout())
+    return counts
+
+
+async def aget_fitment(vehicle_ct, vehicle_id, year=None) -> list[tuple[str, list]]:
+    """
+    Cached aresolve_fitment(); shares cache entries with get_fitment().
+    """
+    version, profile_id = await sync_to_async(_resolve_version)(vehicle_ct, vehicle_id, year)
+    key = PAYLOAD_KEY.format(version=version)
+    products = await cache.aget(key)
+    if products is None:
+        products = await aresolve_fitment(
+            vehicle_ct, vehicle_id, profile_id=profile_id, year=year,
+            concurrency=getattr(settings, "CATALOGUE_ASYNC_CONCURRENCY", 4),
+        )
+        await cache.aset(key, products, timeout=_payload_timeout())
+    return products
+
+
+def invalidate_vehicle(vehicle_ct, vehicle_id) -> None:
+    _bump_version(VEHICLE_VERSION_KEY.format(ct=_ct_id(vehicle_ct), id=vehicle_id))
+
+
+def invalidate_catalogue() -> None:
+    """
+    Drop every cached catalogue payload at once (product edits, bulk imports).
+    """
+    _bump_version(CATALOGUE_VERSION_KEY)
+
+
+def invalidate_profiles() -> None:
+    _bump_version(PROFILES_VERSION_KEY)
@@ -34,4 +34,8 @@ class WearIndicator(models.TextChoices):
 
 class PadAccessoryType(models.TextChoices):
     WEAR_INDICATOR = "W", _("Wear Indicator")
-    ASSEMBLY_KIT = "A", _("Assembly Kit")
\ No newline at end of file
+    ASSEMBLY_KIT = "A", _("Assembly Kit")
+
+class ReferenceKind(models.TextChoices):
+    FMSI = "F", _("FMSI")
+    WVA  = "W", _("WVA")
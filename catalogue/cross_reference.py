@@ -0,0 +1,87 @@
+# catalogue/cross_reference.py
+"""
+FMSI / WVA cross-reference search over the PadReference token table.
+"""
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from catalogue.choices import ReferenceKind
+from catalogue.models import Pad, PadReference
+
+_TOKEN_RE = re.compile(r"[A-Z0-9]+(?:-[A-Z0-9]+)?")
+
+
+def reference_tokens(value) -> set[str]:
+    """
+    Reference numbers in free text: "D1234-8346 (Dodge) / d5678" -> {"D1234-8346", "D1234", "D5678"}.
+    Words without digits are dropped; an FMSI plate suffix also yields its base number,
+    so "D1234" finds "D1234-8346" and the other way round (with less overlap).
+    """
+    tokens = set()
+    for token in _TOKEN_RE.findall(str(value or "").upper()):
+        if not any(c.isdigit() for c in token):
+            continue
+        tokens.add(token[:30])
+        base = token.split("-", 1)[0]
+        if base != token and any(c.isdigit() for c in base):
+            tokens.add(base)
+    return tokens
+
+
+def _pad_references(pad_id, fmsi, wva_number) -> list[PadReference]:
+    return [
+        PadReference(pad_id=pad_id, kind=kind, token=token)
+        for kind, value in ((ReferenceKind.FMSI, fmsi), (ReferenceKind.WVA, wva_number))
+        for token in sorted(reference_tokens(value))
+    ]
+
+
+def index_pad_references(pad) -> None:
+    with transaction.atomic():
+        PadReference.objects.filter(pad_id=pad.pk).delete()
+        PadReference.objects.bulk_create(_pad_references(pad.pk, pad.fmsi, pad.wva_number))
+
+
+def rebuild_pad_references(batch_size: int = 1000) -> int:
+    """
+    Rebuild the whole table from Pad; for imports that bypass save(). Rows are written
+    batch_size at a time as the pads stream in. Returns the token count.
+    """
+    count = 0
+    rows = []
+    with transaction.atomic():
+        PadReference.objects.all().delete()
+        pads = Pad.objects.values_list("pk", "fmsi", "wva_number").iterator(chunk_size=batch_size)
+        for pk, fmsi, wva_number in pads:
+            rows += _pad_references(pk, fmsi, wva_number)
+            if len(rows) >= batch_size:
+                PadReference.objects.bulk_create(rows, batch_size=batch_size)
+                count += len(rows)
+                rows = []
+        PadReference.objects.bulk_create(rows, batch_size=batch_size)
+        count += len(rows)
+    return count
+
+
+def search_pads(query: str, kind: str | None = None, limit: int = 20) -> list[tuple[Pad, list[str]]]:
+    """
+    Pads sharing any FMSI/WVA token with the query, most shared tokens first:
+    [(pad, matched tokens), ...]. Two queries: the token index, then the top pads.
+    """
+    tokens = reference_tokens(query)
+    if not tokens:
+        return []
+    references = PadReference.objects.filter(token__in=tokens)
+    if kind:
+        references = references.filter(kind=kind)
+
+    matched = defaultdict(set)
+    for pad_id, token in references.values_list("pad_id", "token"):
+        matched[pad_id].add(token)
+    overlap = Counter({pad_id: len(found) for pad_id, found in matched.items()})
+    ranked = sorted(overlap, key=lambda pad_id: (-overlap[pad_id], pad_id))[:limit]
+
+    pads = Pad.objects.in_bulk(ranked)
+    return [(pads[pad_id], sorted(matched[pad_id])) for pad_id in ranked if pad_id in pads]
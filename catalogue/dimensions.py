@@ -0,0 +1,83 @@
+# catalogue/dimensions.py
+"""
+Find products by measured dimensions ("diameter 280±1 mm, 5 holes") instead of part number.
+
+Matching runs in two steps: first only the codes are read, so on Postgres the
+<model>_dimensions_idx covering indexes answer the range scan index-only,
+then the page of products is loaded by primary key.
+
+Results come in the order of the index key (dimensions ascending, then code), so a
+page is read straight off the index and the scan stops after it; ranking by distance
+to the range centres would fetch and sort every match first.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from catalogue.models import Disc, Drum, Pad, ShoeKit, Caliper
+
+# product type -> (model, searchable numeric fields); all of them are columns of <model>_dimensions_idx
+DIMENSION_FIELDS = {
+    'disc': (Disc, ('diameter_mm', 'thickness_th_mm', 'num_holes', 'center_bore_mm',
+                    'min_thickness_mm', 'height_mm')),
+    'drum': (Drum, ('diameter_mm', 'width_mm', 'num_holes', 'center_bore_mm', 'height_mm', 'max_diameter_mm')),
+    'pad': (Pad, ('width_mm', 'height_mm', 'thickness_mm')),
+    'caliper': (Caliper, ('diameter_mm', 'num_pistons')),
+    'shoekit': (ShoeKit, ('diameter_mm', 'width_mm', 'master_cylinder_diameter_mm')),
+}
+
+_RANGE_RE = re.compile(r'^\s*(\d+(?:[.,]\d+)?)\s*(?:(±|~|-|:)\s*(\d+(?:[.,]\d+)?))?\s*$')
+
+
+def parse_range(value: str) -> tuple[Decimal, Decimal]:
+    """
+    "280" -> (280, 280); "280±1" / "280~1" -> (279, 281); "279-281" / "279:281" -> (279, 281).
+    Raises ValueError for anything else.
+    """
+    match = _RANGE_RE.match(value or '')
+    if not match:
+        raise ValueError(f"Invalid dimension {value!r}.")
+    try:
+        first = Decimal(match.group(1).replace(',', '.'))
+        second = Decimal(match.group(3).replace(',', '.')) if match.group(3) else None
+    except InvalidOperation:
+        raise ValueError(f"Invalid dimension {value!r}.")
+    if second is None:
+        return first, first
+    if match.group(2) in ('±', '~'):
+        return first - second, first + second
+    return min(first, second), max(first, second)
+
+
+def resolve_field(product_type: str, name: str) -> str | None:
+    """Query parameter -> model field: "diameter"/"diameter_mm" -> "diameter_mm", "holes" -> "num_holes"."""
+    fields = DIMENSION_FIELDS[product_type][1]
+    for candidate in (name, f"{name}_mm", f"num_{name}"):
+        if candidate in fields:
+            return candidate
+    return None
+
+
+def index_order(model) -> list[str]:
+    """Key columns of <model>_dimensions_idx, which is the order results are paged in."""
+    name = f"{model._meta.model_name}_dimensions_idx"
+    return next(list(index.fields) for index in model._meta.indexes if index.name == name)
+
+
+def dimension_codes(product_type: str, ranges: dict):
+    """Codes of the products of one type with every field in ranges ({field: (low, high)}) inside its range."""
+    model, _ = DIMENSION_FIELDS[product_type]
+    filters = {f'{field}__range': bounds for field, bounds in ranges.items()}
+    return model.objects.filter(**filters).order_by(*index_order(model)).values_list('code', flat=True)
+
+
+def find_by_dimensions(product_type: str, ranges: dict, limit: int = 20, offset: int = 0):
+    """
+    Products of one type with every field in ranges ({field: (low, high)}) inside its
+    range, in index order. Returns (products, has_more).
+    """
+    model, _ = DIMENSION_FIELDS[product_type]
+    codes = list(dimension_codes(product_type, ranges)[offset:offset + limit + 1])
+    has_more = len(codes) > limit
+    codes = codes[:limit]
+    products = model.objects.in_bulk(codes)
+    return [products[code] for code in codes if code in products], has_more
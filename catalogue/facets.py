@@ -0,0 +1,152 @@
+# catalogue/facets.py
+"""
+Facet filters for the catalogue page: axle, disc type, wear indicator, braking
+system and price band.
+
+Counts come from one grouped aggregate per product table with fitment rows
+(GROUP BY every facet column that table has) and are cached next to the
+vehicle's product payload (see catalogue.cache.get_facets). Applying a filter
+only narrows the cached payload in Python, so no product table is read again.
+"""
+import functools
+from collections import Counter
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+from catalogue.choices import Axle, DiscType, WearIndicator
+from catalogue.fitment import PRODUCT_SECTIONS, fitment_ids, product_content_types
+
+# (value, label, low, high) in MKD: low <= price < high, None is open-ended
+PRICE_BANDS = (
+    ('0-1000', 'Under 1000 MKD', None, Decimal(1000)),
+    ('1000-3000', '1000 - 3000 MKD', Decimal(1000), Decimal(3000)),
+    ('3000-6000', '3000 - 6000 MKD', Decimal(3000), Decimal(6000)),
+    ('6000-', '6000 MKD and over', Decimal(6000), None),
+)
+PRICE_BAND = 'price_band'
+
+# query parameter / model field -> (label, {value: label}, or None to list values as stored)
+FACETS = {
+    'axle': ('Axle', dict(Axle.choices)),
+    'disc_type': ('Disc type', dict(DiscType.choices)),
+    'wear_indicator': ('Wear indicator', dict(WearIndicator.choices)),
+    'braking_system': ('Braking system', None),
+    PRICE_BAND: ('Price', {value: label for value, label, _, _ in PRICE_BANDS}),
+}
+
+
+def price_band(price) -> str | None:
+    if price is None:
+        return None
+    for value, _, low, high in PRICE_BANDS:
+        if (low is None or price >= low) and (high is None or price < high):
+            return value
+    return None
+
+
+def _price_band_case() -> Case:
+    whens = []
+    for value, _, low, high in PRICE_BANDS:
+        condition = Q(price__isnull=False)
+        if low is not None:
+            condition &= Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        whens.append(When(condition, then=Value(value)))
+    return Case(*whens, default=None, output_field=CharField())
+
+
+@functools.cache
+def facet_fields(model) -> tuple[str, ...]:
+    """The FACETS columns the product model actually has (price band excluded)."""
+    fields = []
+    for name in FACETS:
+        if name == PRICE_BAND:
+            continue
+        try:
+            model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        fields.append(name)
+    return tuple(fields)
+
+
+def compute_facets(vehicle_ct, vehicle_id, profile_id=None, year=None) -> dict[str, dict[str, int]]:
+    """
+    {facet: {value: number of products}} over the vehicle's (or its fitment profile's)
+    available products, one aggregate query per product table that has fitment rows.
+    """
+    ids_by_ct = fitment_ids(vehicle_ct, vehicle_id, profile_id, year)
+    cts = product_content_types()
+
+    counts = {name: Counter() for name in FACETS}
+    for _, model in PRODUCT_SECTIONS:
+        ids = ids_by_ct.get(cts[model].pk)
+        if not ids:
+            continue
+        rows = (
+            model.objects.filter(pk__in=ids, available=True)
+            .annotate(**{PRICE_BAND: _price_band_case()})
+            .values(*facet_fields(model), PRICE_BAND)
+            .annotate(n=Count('pk'))
+            .order_by()
+        )
+        for row in rows:
+            n = row.pop('n')
+            for name, value in row.items():
+                if value:
+                    counts[name][value] += n
+    return {name: dict(values) for name, values in counts.items()}
+
+
+def parse_filters(query) -> dict[str, set[str]]:
+    """Selected facet values from a QueryDict: ?axle=F&axle=R&price_band=1000-3000."""
+    selected = {}
+    for name in FACETS:
+        values = {value for value in query.getlist(name) if value}
+        if values:
+            selected[name] = values
+    return selected
+
+
+def _item_value(item, name):
+    if name == PRICE_BAND:
+        return price_band(item.price)
+    return getattr(item, name, None)
+
+
+def filter_products(products, selected) -> list[tuple[str, list]]:
+    """
+    Narrow a [(title, items), ...] payload to the items matching every selected facet
+    (any of its values). Products without the facet's column never match it.
+    """
+    if not selected:
+        return products
+    return [
+        (title, [item for item in items
+                 if all(_item_value(item, name) in values for name, values in selected.items())])
+        for title, items in products
+    ]
+
+
+def facet_options(counts, selected) -> list[dict]:
+    """
+    Facets with at least one value, for the template:
+    [{name, label, options: [{value, label, count, checked}]}].
+    """
+    facets = []
+    for name, (label, choices) in FACETS.items():
+        values = counts.get(name) or {}
+        if not values:
+            continue
+        order = [value for value in choices if value in values] if choices else sorted(values)
+        chosen = selected.get(name, ())
+        facets.append({
+            'name': name,
+            'label': label,
+            'options': [{'value': value, 'label': (choices or {}).get(value, value),
+                         'count': values[value], 'checked': value in chosen} for value in order],
+        })
+    return facets
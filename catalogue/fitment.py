@@ -0,0 +1,198 @@
+# catalogue/fitment.py
+import asyncio
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections
+from django.db.models import Exists, OuterRef, Q
+
+from catalogue.models import Disc, Drum, Pad, PadAccessory, Hose, WheelCylinder, MasterCylinder, ClutchCylinder, \
+    ClutchMasterCylinder, Caliper, ShoeKit, Shoe, ProportioningValve, Kit, ProductVehicle, FitmentProfileProduct
+from vehicles.choices import VehicleCategory
+from vehicles.models import Car, CommercialVehicle, MotorBike, built_in_q
+
+# Catalogue sections in the order the page renders them: (title, product model)
+PRODUCT_SECTIONS = (
+    ("Brake Discs", Disc),
+    ("Brake Drum", Drum),
+    ("Brake Pad", Pad),
+    ("Pad Accessory", PadAccessory),
+    ("Hose", Hose),
+    ("Wheel Cylinder", WheelCylinder),
+    ("Master Cylinder", MasterCylinder),
+    ("Clutch Cylinder", ClutchCylinder),
+    ("Clutch Master Cylinder", ClutchMasterCylinder),
+    ("Caliper", Caliper),
+    ("Shoe Kit", ShoeKit),
+    ("Shoe", Shoe),
+    ("Proportioning Valve", ProportioningValve),
+    ("Kits", Kit),
+)
+
+
+def find_vehicle(vehicle_type, brand_id=None, model_id=None, type_id=None, displacement=None, year=None):
+    """
+    The vehicle picked on the home page (brand/model/type, or brand/model/displacement[/year]
+    for bikes), with brand and model joined in. None if nothing matches.
+    """
+    try:
+        if vehicle_type == VehicleCategory.BIKE:
+            if not displacement:
+                return None
+            qs = MotorBike.objects.filter(brand_id=brand_id, model_id=model_id, displacement=displacement)
+            if year:
+                # several bikes can share a displacement; the model year tells them apart
+                qs = qs.filter(built_in_q(int(year)))
+        else:
+            if not type_id:
+                return None
+            model = Car if vehicle_type == VehicleCategory.CAR else CommercialVehicle
+            qs = model.objects.filter(brand_id=brand_id, model_id=model_id, pk=type_id)
+        return qs.select_related('brand', 'model').first()
+    except (ValueError, TypeError):
+        # non-numeric ids in the query string
+        return None
+
+
+def vehicle_title(vehicle, year=None) -> str:
+    if isinstance(vehicle, MotorBike):
+        return f"{vehicle.displacement}cc {year}"
+    start = vehicle.date_start.strftime('%m/%y') if vehicle.date_start else '?'
+    end = vehicle.date_end.strftime('%m/%y') if vehicle.date_end else 'Now'
+    return f"{vehicle.name} {start} - {end}"
+
+
+def fitment_year(vehicle, year) -> int | None:
+    """The selected model year as an int for motorbikes; None for other vehicles or no year."""
+    if not isinstance(vehicle, MotorBike) or not year:
+        return None
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+
+def fits_year_q(year: int) -> Q:
+    """ProductVehicle rows whose year range (if any) covers year."""
+    return (Q(year_from__isnull=True) | Q(year_from__lte=year)) & (Q(year_to__isnull=True) | Q(year_to__gte=year))
+
+
+def bike_fitment_rows(bike_id, year: int):
+    """
+    (product_ct_id, product_id) of the parts for bike X in model year Y, in one query:
+    the relation's year range and the bike's own model years are checked together.
+    """
+    bike_ct = ContentType.objects.get_for_model(MotorBike, for_concrete_model=False)
+    built = MotorBike.objects.filter(built_in_q(year), pk=OuterRef("vehicle_id"))
+    return ProductVehicle.objects.filter(fits_year_q(year), Exists(built), vehicle_ct=bike_ct, vehicle_id=bike_id) \
+        .values_list("product_ct_id", "product_id")
+
+
+def product_content_types() -> dict:
+    """
+    {product model: ContentType} for every catalogue section (served from the ContentType cache).
+    """
+    return ContentType.objects.get_for_models(*(model for _, model in PRODUCT_SECTIONS))
+
+
+def _fitment_rows(vehicle_ct, vehicle_id, profile_id=None, year=None):
+    if profile_id is not None:
+        return FitmentProfileProduct.objects.filter(profile_id=profile_id).values_list("product_ct_id", "product_id")
+    if year is not None:
+        return bike_fitment_rows(vehicle_id, year)
+    return ProductVehicle.objects.filter(vehicle_ct=vehicle_ct, vehicle_id=vehicle_id) \
+        .values_list("product_ct_id", "product_id")
+
+
+def fitment_ids(vehicle_ct, vehicle_id, profile_id=None, year=None) -> dict[int, set[str]]:
+    """
+    Read the vehicle's ProductVehicle rows (or its fitment profile's products) once and
+    group product ids by product ContentType id. year (motorbikes) keeps the rows for
+    that model year only.
+    """
+    ids_by_ct = defaultdict(set)
+    rows = _fitment_rows(vehicle_ct, vehicle_id, profile_id, year)
+    for product_ct_id, product_id in rows:
+        ids_by_ct[product_ct_id].add(product_id)
+    return ids_by_ct
+
+
+def _section_queryset(model, ids, available_only: bool = True):
+    qs = model.objects.filter(pk__in=ids)
+    if available_only:
+        qs = qs.filter(available=True)
+    return qs.order_by("pk")
+
+
+def resolve_fitment(vehicle_ct, vehicle_id, available_only: bool = True,
+                    profile_id=None, year=None) -> list[tuple[str, list]]:
+    """
+    Compatible products for one vehicle as [(title, items), ...] in PRODUCT_SECTIONS order.
+
+    Only the product tables that actually have fitment rows are queried (pk__in),
+    so a typical vehicle costs one ProductVehicle read plus a handful of product reads.
+    With profile_id the product ids come from that FitmentProfile instead.
+    """
+    ids_by_ct = fitment_ids(vehicle_ct, vehicle_id, profile_id, year)
+    cts = product_content_types()
+
+    products = []
+    for title, model in PRODUCT_SECTIONS:
+        ids = ids_by_ct.get(cts[model].pk)
+        items = list(_section_queryset(model, ids, available_only)) if ids else []
+        products.append((title, items))
+    return products
+
+
+async def aresolve_fitment(vehicle_ct, vehicle_id, available_only: bool = True,
+                           concurrency: int = 4, profile_id=None, year=None) -> list[tuple[str, list]]:
+    """
+    Async resolve_fitment(). The ProductVehicle read goes through the async ORM, then the
+    product tables with hits are read concurrently, at most `concurrency` at a time.
+
+    The async ORM runs every query on one shared thread, so the per-table reads use
+    sync_to_async(thread_sensitive=False) instead: each gets a worker thread and its own
+    connection, and their round trips overlap.
+    """
+    ids_by_ct = defaultdict(set)
+    rows = await sync_to_async(_fitment_rows)(vehicle_ct, vehicle_id, profile_id, year)
+    async for product_ct_id, product_id in rows:
+        ids_by_ct[product_ct_id].add(product_id)
+    cts = await sync_to_async(product_content_types)()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def fetch(model, ids):
+        # executor threads outlive requests and may never run again: drop connections past
+        # CONN_MAX_AGE before the query, and release this one (unless persistent) right after
+        close_old_connections()
+        try:
+            return list(_section_queryset(model, ids, available_only))
+        finally:
+            close_old_connections()
+
+    async def fetch_section(model):
+        ids = ids_by_ct.get(cts[model].pk)
+        if not ids:
+            return []
+        async with semaphore:
+            return await sync_to_async(fetch, thread_sensitive=False)(model, ids)
+
+    results = await asyncio.gather(*(fetch_section(model) for _, model in PRODUCT_SECTIONS))
+    return [(title, items) for (title, _), items in zip(PRODUCT_SECTIONS, results)]
+
+
+def iter_fitment(vehicle_ct, vehicle_id, chunk_size: int = 100, available_only: bool = True, year=None):
+    """
+    Lazy resolve_fitment(): yields (title, items) for each section that has fitment rows,
+    where items is a chunked iterator (server-side cursor on Postgres). Sections are only
+    queried when the caller advances to them, so each can be sent as soon as it is read.
+    """
+    ids_by_ct = fitment_ids(vehicle_ct, vehicle_id, year=year)
+    cts = product_content_types()
+
+    for title, model in PRODUCT_SECTIONS:
+        ids = ids_by_ct.get(cts[model].pk)
+        if not ids:
+            continue
+        yield title, _section_queryset(model, ids, available_only).iterator(chunk_size=chunk_size)
@@ -0,0 +1,261 @@
+# catalogue/fleet.py
+"""
+Fleet queries: the parts that fit every vehicle of a fleet, or any of them.
+
+Each process keeps the whole ProductVehicle table in memory as one bitmap of
+products per vehicle (products are numbered densely as they are first seen), so
+"pads for all 40 vans" is 40 bitmap ANDs rather than a join. Bitmaps are roaring
+bitmaps when pyroaring is installed and plain int sets otherwise. Year-limited
+motorbike relations are kept aside and only count for a bike given with a model
+year (b:300:2004) that the bike was built in and the relation's range covers.
+Availability is not indexed: matches are narrowed to available products in the
+database, as on the catalogue page.
+
+The index follows the table by id watermark: rows with a higher id than the last
+one loaded are added in place. When the row count no longer adds up (deleted
+relations, or a transaction that committed rows below the watermark late) a new
+index is built in a background thread; requests keep using the current one until
+it is ready.
+"""
+import functools
+import operator
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Count, Max
+
+from catalogue.fitment import PRODUCT_SECTIONS, product_content_types
+from catalogue.models import ProductVehicle
+from vehicles.models import Car, CommercialVehicle, MotorBike, built_in_q
+
+try:
+    from pyroaring import BitMap
+except ImportError:  # optional: int sets answer the same queries with more memory
+    BitMap = set
+
+VEHICLE_MODELS = {model.TYPE_CODE: model for model in (Car, CommercialVehicle, MotorBike)}
+LOAD_CHUNK_SIZE = 20000
+# product codes per availability query
+AVAILABLE_CHUNK_SIZE = 5000
+
+
+class FleetIndex:
+    """
+    {(vehicle_ct_id, vehicle_id): bitmap of product numbers} for relations without a
+    year range, {(vehicle_ct_id, vehicle_id): [(number, year_from, year_to)]} for the
+    others, plus one bitmap per product ContentType to restrict results to a type.
+    """
+
+    def __init__(self):
+        self.checked_at = None
+        self._reset()
+
+    def _reset(self):
+        self.products = []    # product number -> (product_ct_id, product_id)
+        self.numbers = {}     # (product_ct_id, product_id) -> product number
+        self.vehicles = {}
+        self.limited = {}
+        self.by_type = {}
+        self.watermark = 0
+        self.rows = 0
+
+    def _number(self, key) -> int:
+        number = self.numbers.get(key)
+        if number is None:
+            number = self.numbers[key] = len(self.products)
+            self.products.append(key)
+            self.by_type.setdefault(key[0], BitMap()).add(number)
+        return number
+
+    def _load(self, rows):
+        for pk, product_ct_id, product_id, vehicle_ct_id, vehicle_id, year_from, year_to in rows:
+            number = self._number((product_ct_id, product_id))
+            if year_from is None and year_to is None:
+                self.vehicles.setdefault((vehicle_ct_id, vehicle_id), BitMap()).add(number)
+            else:
+                self.limited.setdefault((vehicle_ct_id, vehicle_id), []).append((number, year_from, year_to))
+            self.watermark = max(self.watermark, pk)
+            self.rows += 1
+
+    def _rows(self, after, upto):
+        return (ProductVehicle.objects.filter(pk__gt=after, pk__lte=upto).order_by()
+                .values_list('pk', 'product_ct_id', 'product_id', 'vehicle_ct_id', 'vehicle_id',
+                             'year_from', 'year_to')
+                .iterator(chunk_size=LOAD_CHUNK_SIZE))
+
+    def refresh(self) -> bool:
+        """
+        Catch up with ProductVehicle by id watermark. Returns False when the index no
+        longer matches the table (deleted rows, rows committed below the watermark)
+        and has to be rebuilt.
+        """
+        stats = ProductVehicle.objects.aggregate(last=Max('pk'), rows=Count('pk'))
+        last, rows = stats['last'] or 0, stats['rows']
+        if last > self.watermark:
+            self._load(self._rows(self.watermark, last))
+        return self.rows == rows
+
+    def bitmap(self, vehicle):
+        """
+        Product numbers fitting vehicle (vehicle_ct_id, vehicle_id, year); year-limited
+        relations count only when year is given and inside their range.
+        """
+        vehicle_ct_id, vehicle_id, year = vehicle
+        bitmap = self.vehicles.get((vehicle_ct_id, vehicle_id), BitMap())
+        if year is None:
+            return bitmap
+        fitting = [number for number, year_from, year_to in self.limited.get((vehicle_ct_id, vehicle_id), ())
+                   if (year_from is None or year_from <= year) and (year_to is None or year <= year_to)]
+        return bitmap | BitMap(fitting) if fitting else bitmap
+
+    def match(self, vehicles, match_all=True, product_ct_id=None):
+        """
+        Product numbers fitting all (or any) of vehicles [(vehicle_ct_id, vehicle_id, year)],
+        optionally only those of one product type.
+        """
+        bitmaps = [self.bitmap(vehicle) for vehicle in vehicles]
+        if not bitmaps:
+            return BitMap()
+        if match_all:
+            bitmaps.sort(key=len)  # smallest first keeps every AND small
+            result = functools.reduce(operator.and_, bitmaps)
+        else:
+            result = functools.reduce(operator.or_, bitmaps)
+        if product_ct_id is not None:
+            result = result & self.by_type.get(product_ct_id, BitMap())
+        return result
+
+    def coverage(self, vehicles, numbers) -> Counter:
+        """How many of vehicles each product number in numbers fits."""
+        counts = Counter()
+        for vehicle in vehicles:
+            counts.update(self.bitmap(vehicle) & numbers)
+        return counts
+
+
+_index: FleetIndex | None = None
+_rebuild_lock = threading.Lock()
+_rebuilding = False
+
+
+def _build_index() -> FleetIndex:
+    index = FleetIndex()
+    index.refresh()
+    index.checked_at = time.monotonic()
+    return index
+
+
+def _rebuild_in_background():
+    global _index, _rebuilding
+    try:
+        _index = _build_index()
+    finally:
+        connection.close()
+        with _rebuild_lock:
+            _rebuilding = False
+
+
+def _schedule_rebuild():
+    global _rebuilding
+    with _rebuild_lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+    threading.Thread(target=_rebuild_in_background, name="fleet-index-rebuild", daemon=True).start()
+
+
+def get_fleet_index() -> FleetIndex:
+    """
+    The process-wide FleetIndex, built on first use and caught up at most once every
+    FLEET_INDEX_CHECK_INTERVAL seconds; a full rebuild runs in a background thread.
+    """
+    global _index
+    if _index is None:
+        _index = _build_index()
+    now = time.monotonic()
+    if now - _index.checked_at >= settings.FLEET_INDEX_CHECK_INTERVAL:
+        _index.checked_at = now
+        if not _index.refresh():
+            _schedule_rebuild()
+    return _index
+
+
+def parse_fleet(values) -> tuple[list[tuple[int, int, int | None]], list[str]]:
+    """
+    ["c:100", "t:200", "b:300:2004"] -> ([(vehicle_ct_id, vehicle_id, year), ...], [unparseable values]).
+    The model year is for motorbikes only.
+    """
+    cts = {code: ContentType.objects.get_for_model(model, for_concrete_model=False).pk
+           for code, model in VEHICLE_MODELS.items()}
+    vehicles, invalid = [], []
+    for value in values:
+        code, vehicle_id, *year = str(value).strip().split(':')
+        if code in cts and vehicle_id.isdigit() and (
+                not year or (len(year) == 1 and year[0].isdigit() and code == MotorBike.TYPE_CODE)):
+            vehicles.append((cts[code], int(vehicle_id), int(year[0]) if year else None))
+        else:
+            invalid.append(value)
+    return list(dict.fromkeys(vehicles)), invalid
+
+
+def _not_built(vehicles) -> set:
+    """
+    The (bike, year) vehicles whose bike was not built in that model year, one query
+    per distinct year.
+    """
+    bike_ct_id = ContentType.objects.get_for_model(MotorBike, for_concrete_model=False).pk
+    bikes_by_year = defaultdict(set)
+    for vehicle_ct_id, vehicle_id, year in vehicles:
+        if year is not None and vehicle_ct_id == bike_ct_id:
+            bikes_by_year[year].add(vehicle_id)
+    not_built = set()
+    for year, ids in bikes_by_year.items():
+        built = set(MotorBike.objects.filter(built_in_q(year), pk__in=ids).values_list('pk', flat=True))
+        not_built.update((bike_ct_id, pk, year) for pk in ids - built)
+    return not_built
+
+
+def _available(rows):
+    """The rows whose product is available, one query per product type and chunk."""
+    codes_by_ct = defaultdict(list)
+    for ct_id, code, _ in rows:
+        codes_by_ct[ct_id].append(code)
+    available = set()
+    for ct_id, codes in codes_by_ct.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        for start in range(0, len(codes), AVAILABLE_CHUNK_SIZE):
+            available.update((ct_id, code) for code in model.objects.filter(
+                pk__in=codes[start:start + AVAILABLE_CHUNK_SIZE], available=True).values_list('pk', flat=True))
+    return [row for row in rows if row[:2] in available]
+
+
+def fleet_products(vehicles, match_all=True, product_model=None):
+    """
+    [(product_ct_id, product_id, fits)] of the available products for the fleet
+    [(vehicle_ct_id, vehicle_id, year)], in catalogue section order then code; fits is
+    the number of fleet vehicles the product fits. For any-matches the products
+    fitting the most vehicles come first.
+    """
+    index = get_fleet_index()
+    cts = product_content_types()
+    product_ct_id = cts[product_model].pk if product_model is not None else None
+    # a bike given in a year it was not built in fits nothing
+    not_built = _not_built(vehicles)
+    fitting = [vehicle for vehicle in vehicles if vehicle not in not_built]
+    if match_all and not_built:
+        numbers = BitMap()
+    else:
+        numbers = index.match(fitting, match_all=match_all, product_ct_id=product_ct_id)
+
+    if match_all:
+        fits = dict.fromkeys(numbers, len(vehicles))
+    else:
+        fits = index.coverage(fitting, numbers)
+    section = {cts[model].pk: n for n, (_, model) in enumerate(PRODUCT_SECTIONS)}
+    rows = _available([(*index.products[number], fits[number]) for number in numbers])
+    rows.sort(key=lambda row: (-row[2], section.get(row[0], len(section)), row[1]))
+    return rows
@@ -10,6 +10,8 @@ from django.db import transaction
 
 from catalogue.models import Disc, Drum, Pad, PadAccessory, Hose, CylinderBase, WheelCylinder, MasterCylinder, \
     ClutchCylinder, ClutchMasterCylinder, Caliper, ShoeKit, ProportioningValve, Shoe, Kit
+from catalogue.cache import invalidate_catalogue
+from catalogue.progress import ImportProgress
 from catalogue.choices import DiscType, Axle, AssemblySide, WearIndicator, PadAccessoryType, Material, CaliperPosition
 
 # -------------------- Aliases (same idea as your script) --------------------
@@ -374,6 +376,7 @@ class BaseProductResource(resources.ModelResource):
     - Upsert by 'code'
     - Alias remapping in before_import_row
     - Compute 'available' from quantity / price
+    - Throttled progress on stdout (catalogue.progress) instead of a line per row
     """
     code = fields.Field(attribute="code", column_name="code")
     ean = fields.Field(attribute="ean", widget=EANWidget(), column_name="ean")
@@ -436,9 +439,20 @@ class BaseProductResource(resources.ModelResource):
             if k in row and isinstance(row[k], str):
                 row[k] = row[k].strip()
 
-        # Quick progress print (import-export shows row numbers already, but keeping as requested)
-        code = (row.get("code") or "").strip() or "(missing)"
-        print(f"[{self._meta.model.__name__.upper()}] Processing: code={code}")
+        progress = getattr(self, "_progress", None)
+        if progress is not None:
+            progress.advance()
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        self._progress = ImportProgress(self._meta.model.__name__.lower(), total=len(dataset))
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        progress = getattr(self, "_progress", None)
+        if progress is not None:
+            progress.finish(counters={key: n for key, n in result.totals.items() if n})
+            self._progress = None
 
     def import_obj(self, obj, data, dry_run, **kwargs):
         """
@@ -455,10 +469,13 @@ class BaseProductResource(resources.ModelResource):
         """
         Wrap whole import in a single transaction (unless dry-run).
         """
-        return super().import_data(
+        result = super().import_data(
             dataset, dry_run=dry_run, raise_errors=raise_errors,
             use_transactions=True, collect_failed_rows=collect_failed_rows, **kwargs
         )
+        if not dry_run:
+            transaction.on_commit(invalidate_catalogue)
+        return result
 
 # -------------------- Disc Resource --------------------
 class DiscResource(BaseProductResource):
@@ -0,0 +1,111 @@
+# catalogue/management/commands/benchmark_dimension_finder.py
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from catalogue.dimensions import dimension_codes, find_by_dimensions
+from catalogue.models import Disc
+
+
+# FOR RUNNING USE:
+# python manage.py benchmark_dimension_finder
+#
+# Smaller table, more runs, and print the whole query plans:
+# python manage.py benchmark_dimension_finder --products 100000 --repeat 20 --explain
+
+
+QUERIES = (
+    ("diameter 280±1", {"diameter_mm": (Decimal("279"), Decimal("281"))}),
+    ("diameter 280±1, 5 holes", {"diameter_mm": (Decimal("279"), Decimal("281")), "num_holes": (5, 5)}),
+    ("diameter 300±0.5, thickness 22-26, 5 holes, bore 65±1", {
+        "diameter_mm": (Decimal("299.5"), Decimal("300.5")),
+        "thickness_th_mm": (Decimal("22"), Decimal("26")),
+        "num_holes": (5, 5),
+        "center_bore_mm": (Decimal("64"), Decimal("66")),
+    }),
+    ("diameter 240-340", {"diameter_mm": (Decimal("240"), Decimal("340"))}),
+    ("diameter 280±1, min thickness 20-24, height 40-50", {
+        "diameter_mm": (Decimal("279"), Decimal("281")),
+        "min_thickness_mm": (Decimal("20"), Decimal("24")),
+        "height_mm": (Decimal("40"), Decimal("50")),
+    }),
+)
+
+# how each backend's plan says the codes came from the index alone
+INDEX_ONLY = {"postgresql": "Index Only Scan", "sqlite": "COVERING INDEX"}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dimension finder on a generated Disc table (default 500k rows). "
+        "The rows are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=500_000, help="Discs to generate (default: 500000).")
+        parser.add_argument("--repeat", type=int, default=10, help="Runs per query (default: 10).")
+        parser.add_argument("--explain", action="store_true", help="Print the whole plan of each code query.")
+
+    def handle(self, *args, **opts):
+        if opts["products"] < 1:
+            raise CommandError("--products must be positive.")
+        try:
+            with transaction.atomic():
+                self._run(opts["products"], opts["repeat"], opts["explain"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, count, repeat, explain):
+        rnd = random.Random(0)
+        started = time.perf_counter()
+        batch = []
+        for i in range(count):
+            thickness = rnd.randrange(8, 33)
+            batch.append(Disc(
+                code=f"BENCH{i:07d}",
+                diameter_mm=Decimal(rnd.randrange(400, 761)) / 2,  # 200.0 - 380.0 mm in 0.5 steps
+                thickness_th_mm=Decimal(thickness),
+                min_thickness_mm=Decimal(thickness) - Decimal(rnd.randrange(10, 31)) / 10,
+                height_mm=Decimal(rnd.randrange(300, 701)) / 10,
+                num_holes=rnd.choice((4, 5, 5, 6)),
+                center_bore_mm=Decimal(rnd.randrange(540, 721)) / 10,
+            ))
+            if len(batch) == 5000:
+                Disc.objects.bulk_create(batch)
+                batch.clear()
+        Disc.objects.bulk_create(batch)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE catalogue_disc")
+        self.stdout.write(f"Generated {count} discs in {time.perf_counter() - started:.1f} s ({connection.vendor})")
+        if connection.vendor == "postgresql":
+            # the rows are never committed, so the visibility map is not set and the
+            # index-only scans still report heap fetches; on a vacuumed table they do not
+            self.stdout.write("Plans run EXPLAIN ANALYZE on the first page (21 codes).")
+
+        for label, ranges in QUERIES:
+            samples = []
+            for _ in range(repeat):
+                t = time.perf_counter()
+                products, _ = find_by_dimensions("disc", ranges)
+                samples.append(time.perf_counter() - t)
+            self.stdout.write(
+                f"  {label:<56} {len(products):>3} rows"
+                f"  mean {statistics.mean(samples) * 1000:8.2f} ms  min {min(samples) * 1000:8.2f} ms"
+            )
+            page = dimension_codes("disc", ranges)[:21]
+            plan = page.explain(analyze=True) if connection.vendor == "postgresql" else page.explain()
+            marker = INDEX_ONLY.get(connection.vendor)
+            if marker:
+                self.stdout.write(f"    index-only: {'yes' if marker in plan else 'no'}")
+            if explain:
+                self.stdout.write(plan)
@@ -0,0 +1,116 @@
+# catalogue/management/commands/benchmark_product_search.py
+import statistics
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchRank
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+
+from catalogue.models import Disc, ProductIndex
+from catalogue.product_index import SEARCH_CANDIDATES, search_products, search_query
+
+
+# FOR RUNNING USE:
+# python manage.py benchmark_product_search
+#
+# Smaller index, more runs, and also time ranking every match (the unbounded query):
+# python manage.py benchmark_product_search --rows 500000 --repeat 50 --rank-all
+
+
+QUERIES = (
+    ("common word", "brake"),
+    ("two common words", "brake disc"),
+    ("brand + thread", "ate m10"),
+    ("code prefix", "bench00123"),
+    ("exact code", "BENCH0012345"),
+    ("code with separators", "bench 001 2345"),
+    ("EAN", "4000000012345"),
+)
+
+INSERT_CHUNK = 500_000
+
+# ProductIndex rows straight from generate_series; the search_vector trigger fills the vector
+INSERT_SQL = """
+INSERT INTO {table} (product_ct_id, code, normalized_code, ean, search_text)
+SELECT %s, 'BENCH' || lpad(i::text, 7, '0'), 'BENCH' || lpad(i::text, 7, '0'), (4000000000000 + i)::text,
+       (ARRAY['Brake Disc Vented', 'Brake Disc Solid', 'Brake Pad Set', 'Brake Drum', 'Brake Shoe Kit'])[1 + i % 5]
+       || ' ' || (ARRAY['ATE', 'TRW', 'Bosch', 'Brembo', 'Lucas', 'Textar'])[1 + (i / 5) % 6]
+       || ' M' || (8 + i % 7) || 'x1.25'
+FROM generate_series(%s, %s) AS i
+"""
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _rank_all(text, limit):
+    # search_products() before the candidate bound: every match is ranked
+    query = search_query(text)
+    return list(
+        ProductIndex.objects.filter(search_vector=query)
+        .defer('search_text', 'search_vector')
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', 'code')[:limit + 1]
+    )
+
+
+def _p95(samples):
+    return statistics.quantiles(samples, n=20, method="inclusive")[18] if len(samples) > 1 else samples[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the product search (first page) on a generated ProductIndex (default 2M rows) "
+        "and report p50/p95. PostgreSQL only; the rows are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000, help="Index rows to generate (default: 2000000).")
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per query (default: 20).")
+        parser.add_argument("--page-size", type=int, default=20, help="Results per page (default: 20).")
+        parser.add_argument("--rank-all", action="store_true",
+                            help="Also time ranking every match, without the candidate bound.")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("The product search needs a PostgreSQL database.")
+        if opts["rows"] < 1 or opts["repeat"] < 1:
+            raise CommandError("--rows and --repeat must be positive.")
+        try:
+            with transaction.atomic():
+                self._run(opts["rows"], opts["repeat"], opts["page_size"], opts["rank_all"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, count, repeat, page_size, rank_all):
+        started = time.perf_counter()
+        ct = ContentType.objects.get_for_model(Disc)
+        sql = INSERT_SQL.format(table=connection.ops.quote_name(ProductIndex._meta.db_table))
+        with connection.cursor() as cursor:
+            for first in range(0, count, INSERT_CHUNK):
+                cursor.execute(sql, [ct.pk, first, min(first + INSERT_CHUNK, count) - 1])
+                self.stdout.write(f"  {min(first + INSERT_CHUNK, count)}/{count} rows")
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(ProductIndex._meta.db_table)}")
+        self.stdout.write(
+            f"Generated {count} index rows in {time.perf_counter() - started:.1f} s; "
+            f"ranking at most {SEARCH_CANDIDATES} code hits + {SEARCH_CANDIDATES} matches per search"
+        )
+
+        cases = [("bounded", lambda text: search_products(text, limit=page_size)[0])]
+        if rank_all:
+            cases.append(("rank all", lambda text: _rank_all(text, page_size)))
+        for label, text in QUERIES:
+            for name, search in cases:
+                samples = []
+                for _ in range(repeat):
+                    t = time.perf_counter()
+                    entries = search(text)
+                    samples.append(time.perf_counter() - t)
+                self.stdout.write(
+                    f"  {label:<22} {name:<9} {len(entries):>3} rows"
+                    f"  p50 {statistics.median(samples) * 1000:8.2f} ms  p95 {_p95(samples) * 1000:8.2f} ms"
+                )
@@ -10,6 +10,8 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction, models
 # Adjust this import if ProductBase is defined in a different module
 from catalogue.models import ProductBase
+from catalogue.cache import invalidate_catalogue
+from catalogue.progress import ImportProgress
 
 
 # FOR RUNNING USE:
@@ -23,6 +25,9 @@ from catalogue.models import ProductBase
 #
 # Preview only, printing every 10 rows:
 # python manage.py import_prices /path/to/file.csv --dry-run --print-every 10
+#
+# Keep the summary (counts, phase timings, peak memory) as JSON:
+# python manage.py import_prices /path/to/file.csv --summary-json prices_summary.json
 
 
 def norm(name: str | None) -> str:
@@ -105,8 +110,14 @@ class Command(BaseCommand):
         parser.add_argument(
             "--print-every",
             type=int,
-            default=1,
-            help="Print a progress line for every N CSV rows processed (default: 1 = every row).",
+            default=0,
+            help="Also print the outcome of every N-th CSV row (default: 0 = off; progress is reported "
+                 "every IMPORT_PROGRESS_INTERVAL seconds either way).",
+        )
+        parser.add_argument(
+            "--summary-json",
+            metavar="PATH",
+            help="Also write the import summary (counts, phase timings, peak memory) to PATH as JSON.",
         )
 
     def handle(self, *args, **opts):
@@ -125,8 +136,10 @@ class Command(BaseCommand):
         if not product_models:
             raise CommandError("No concrete models found that inherit ProductBase.")
 
+        progress = ImportProgress("prices", write=self.stdout.write)
+
         # Read CSV header & rows
-        with csv_path.open("r", newline="", encoding="utf-8") as f:
+        with progress.phase("read"), csv_path.open("r", newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
             if not reader.fieldnames:
                 raise CommandError("CSV appears to have no header row.")
@@ -170,12 +183,14 @@ class Command(BaseCommand):
         # Build a map code -> list[(model, instance)]
         # (We might update multiple models if the same code exists in multiple product tables.)
         found_map: Dict[str, List[Tuple[models.Model, ProductBase]]] = {c: [] for c in unique_codes}
-        for model in product_models:
-            qs = model.objects.filter(pk__in=unique_codes).only("pk", "price", "quantity", "available")
-            for obj in qs.iterator():
-                found_map[str(obj.pk)].append((model, obj))
+        with progress.phase("lookup"):
+            for model in product_models:
+                qs = model.objects.filter(pk__in=unique_codes).only("pk", "price", "quantity", "available")
+                for obj in qs.iterator():
+                    found_map[str(obj.pk)].append((model, obj))
 
         total = len(rows)
+        progress.total = total
         updated = 0
         skipped_not_found = 0
         unchanged = 0
@@ -183,9 +198,10 @@ class Command(BaseCommand):
         line_no = 0
 
         # Apply updates row-by-row for clear reporting
-        with (transaction.atomic() if not opts["dry_run"] else self._noop_context()):
+        with progress.phase("apply"), (transaction.atomic() if not opts["dry_run"] else self._noop_context()):
             for row in rows:
                 line_no += 1
+                progress.advance()
                 code_raw = row.get(code_col)
                 code = (code_raw or "").strip()
                 if not code:
@@ -243,6 +259,10 @@ class Command(BaseCommand):
                     if opts["print_every"] and line_no % opts["print_every"] == 0:
                         self.stdout.write(f"[line {line_no}] {code}: unchanged")
 
+        if not opts["dry_run"]:
+            with progress.phase("invalidate"):
+                invalidate_catalogue()
+
         # Summary
         self.stdout.write("")
         self.stdout.write(self.style.SUCCESS("Done."))
@@ -254,6 +274,9 @@ class Command(BaseCommand):
             self.stdout.write(f"  Set available=True: {touched_available}")
         if opts["dry_run"]:
             self.stdout.write(self.style.WARNING("DRY RUN: no changes were saved."))
+        progress.finish(opts["summary_json"], counters=dict(
+            updated=updated, unchanged=unchanged, not_found=skipped_not_found, set_available=touched_available,
+        ))
 
     # --- helpers ---
 
@@ -1,15 +1,38 @@
 from __future__ import annotations
 import csv
-from dataclasses import dataclass
+import io
+import multiprocessing
+import os
+from collections import Counter
 from typing import Iterable, List, Optional, Sequence, Tuple
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, connections, transaction
 from django.db.models import Model
 
+from catalogue.product_index import MATCH_CODE
+
 # FOR RUNNING USE:
 # python manage.py import_relations "path to relations csv"
+#
+# Motorbike relations (type_id = MotorBike id, optional year_from/year_to or year columns):
+# python manage.py import_relations "path to bike relations csv" --bikes
+#
+# Large files on PostgreSQL (COPY into a staging table, one merge, exact duplicate counts):
+# python manage.py import_relations "path to relations csv" --copy
+#
+# The CSV as the full fitment list of every product it mentions (stale relations are deleted):
+# python manage.py import_relations "path to relations csv" --sync
+#
+# Resolve rows on several cores (parsing and lookups run in worker processes, one writer):
+# python manage.py import_relations "path to relations csv" --workers 4 --copy
+#
+# Also match codes by EAN or without separators (reported separately in the summary):
+# python manage.py import_relations "path to relations csv" --fuzzy-codes
+#
+# Keep the summary (counts, phase timings, peak memory) as JSON:
+# python manage.py import_relations "path to relations csv" --summary-json relations_summary.json
 
 
 # ---------- User-editable assumptions ----------
@@ -17,8 +40,9 @@ from django.db.models import Model
 VEHICLE_MODEL_PATHS: Sequence[str] = (
     "vehicles.Car",
     "vehicles.CommercialVehicle",
-    # Add "vehicles.Motorbike" here if needed in the future.
 )
+# Motorbike ids overlap car ids, so bikes are imported separately (--bikes).
+BIKE_MODEL_PATH: str = "vehicles.MotorBike"
 
 # If your product models all subclass a common abstract base (e.g., ProductBase),
 # set this to the dotted path of that base class to auto-discover products.
@@ -46,11 +70,9 @@ EXPLICIT_PRODUCT_MODELS: Sequence[str] = (
 PRODUCT_BASE_PATH = None
 # ----------------------------------------------
 
-
-@dataclass(frozen=True)
-class FoundModel:
-    model: type[Model]
-    instance: Model
+# --workers: the file is cut into at least workers * 4 byte ranges, none over CHUNK_BYTES
+CHUNK_BYTES = 8 * 1024 * 1024
+REQUIRED_COLUMNS = {"code", "type_id"}
 
 
 def _load_model(path: str) -> type[Model]:
@@ -87,44 +109,41 @@ def _product_models() -> List[type[Model]]:
     return models
 
 
-def _vehicle_models() -> List[type[Model]]:
+def _vehicle_models(bikes: bool = False) -> List[type[Model]]:
+    if bikes:
+        return [_load_model(BIKE_MODEL_PATH)]
     return [ _load_model(p) for p in VEHICLE_MODEL_PATHS ]
 
 
-def _find_product_by_code(code: str, product_models: Sequence[type[Model]]) -> Optional[FoundModel]:
-    # Try exact match in each model by a 'code' field, then fallback to pk lookup if code==pk.
-    for M in product_models:
-        # Prefer a 'code' unique field if present
-        if "code" in M._meta.fields_map or any(f.name == "code" for f in M._meta.fields):
-            try:
-                obj = M._default_manager.get(code=code)
-                return FoundModel(model=M, instance=obj)
-            except M.DoesNotExist:
-                pass
-        # If primary key is also a string code, this may succeed
-        try:
-            obj = M._default_manager.get(pk=code)
-            return FoundModel(model=M, instance=obj)
-        except M.DoesNotExist:
-            continue
-        except (ValueError, TypeError):
-            # pk type mismatch (e.g. int pk but code is non-numeric)
-            continue
-    return None
+def _year_range(row: dict) -> Tuple[Optional[int], Optional[int]]:
+    """
+    (year_from, year_to) from a bike row: year_from/year_to columns, or a single year.
+    Blank means open; raises ValueError for non-numeric years.
+    """
+    year = (row.get("year") or "").strip()
+    first = (row.get("year_from") or "").strip() or year
+    last = (row.get("year_to") or "").strip() or year
+    return (int(first) if first else None), (int(last) if last else None)
 
 
-def _find_vehicle_by_id(type_id: int, vehicle_models: Sequence[type[Model]], prefer: str) -> List[FoundModel]:
+def _vehicle_ids(vehicle_models: Sequence[type[Model]]) -> dict[int, List[type[Model]]]:
     """
-    Returns a list of matches. With prefer='car' we prefer first model that matches;
-    with prefer='cv' we prefer later models; with prefer='both' we return all matches.
+    {vehicle id: vehicle models having that id, in vehicle_models order}: one pk-only
+    query per vehicle table.
     """
-    matches: List[FoundModel] = []
+    ids: dict[int, List[type[Model]]] = {}
     for M in vehicle_models:
-        try:
-            obj = M._default_manager.get(pk=type_id)
-            matches.append(FoundModel(model=M, instance=obj))
-        except M.DoesNotExist:
-            continue
+        for pk in M._default_manager.order_by().values_list("pk", flat=True).iterator(chunk_size=10000):
+            ids.setdefault(pk, []).append(M)
+    return ids
+
+
+def _find_vehicle_by_id(type_id: int, vehicle_ids: dict[int, List[type[Model]]], prefer: str) -> List[type[Model]]:
+    """
+    Returns the vehicle models having this id. With prefer='car' we prefer first model that matches;
+    with prefer='cv' we prefer later models; with prefer='both' we return all matches.
+    """
+    matches = vehicle_ids.get(type_id)
     if not matches:
         return []
     if prefer == "both":
@@ -137,6 +156,97 @@ def _find_vehicle_by_id(type_id: int, vehicle_models: Sequence[type[Model]], pre
     return [matches[0]]
 
 
+def _check_headers(fieldnames: Optional[Sequence[str]]) -> None:
+    # normalize headers
+    headers = {h.strip().lower() for h in fieldnames or []}
+    missing = REQUIRED_COLUMNS - headers
+    if missing:
+        raise CommandError(f"CSV missing required columns: {', '.join(sorted(missing))}. Found headers: {sorted(headers)}")
+
+
+def _resolve_row(
+    row: dict,
+    products,
+    vehicle_ids: dict[int, List[type[Model]]],
+    vehicle_ct_ids: dict[type[Model], int],
+    prefer: str,
+    bikes: bool,
+) -> Tuple[List[tuple], Optional[str]]:
+    """
+    ([(product_ct_id, product_id, vehicle_ct_id, vehicle_id, year_from, year_to), ...], note)
+    for a CSV row, where note is None for an exact code match or the fuzzy match kind
+    ("ean" / "normalized"); ([], "product" / "vehicle") when it has to be skipped.
+    """
+    code = (row.get("code") or "").strip()
+    type_raw = (row.get("type_id") or "").strip()
+
+    if not code:
+        return [], "product"
+    try:
+        type_id = int(type_raw)
+        year_from, year_to = _year_range(row) if bikes else (None, None)
+    except ValueError:
+        return [], "vehicle"
+
+    found_product, match = products.match(code)
+    if not found_product:
+        return [], "product"
+
+    found_vehicles = _find_vehicle_by_id(type_id, vehicle_ids, prefer)
+    if not found_vehicles:
+        return [], "vehicle"
+
+    product_ct_id, product_id = found_product
+    return [
+        (product_ct_id, product_id, vehicle_ct_ids[vehicle_model], type_id, year_from, year_to)
+        for vehicle_model in found_vehicles
+    ], (None if match == MATCH_CODE else match)
+
+
+def _byte_ranges(csv_path: str, parts: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    (header columns, [(start, end), ...]): the data after the header line cut into about
+    `parts` byte ranges, each moved forward to the next line start. Assumes no quoted
+    field spans lines.
+    """
+    size = os.path.getsize(csv_path)
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        bounds = [f.tell()]
+        step = max((size - bounds[0]) // parts, 1)
+        while True:
+            f.seek(bounds[-1] + step)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    fieldnames = next(csv.reader([header.decode("utf-8")]), [])
+    return fieldnames, [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+# Lookup maps for --workers, set in the parent right before the pool forks so the
+# workers inherit them instead of querying the database again.
+_worker_state: Optional[dict] = None
+
+
+def _resolve_chunk(task: Tuple[str, int, int, List[str]]) -> Tuple[List[tuple], Counter]:
+    """Worker: parse and resolve one byte range; returns (relations, row counters)."""
+    csv_path, start, end, fieldnames = task
+    with open(csv_path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    relations: List[tuple] = []
+    stats: Counter = Counter()
+    for row in csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames):
+        stats["total"] += 1
+        resolved, note = _resolve_row(row, **_worker_state)
+        if note:
+            stats[note] += 1
+        relations.extend(resolved)
+    return relations, stats
+
+
 class Command(BaseCommand):
     help = "Import ProductVehicle relations from a CSV with columns: code, type_id, title (ignored)."
 
@@ -155,38 +265,102 @@ class Command(BaseCommand):
             default=500,
             help="Write in batches (for bulk_create when --use-bulk).",
         )
+        parser.add_argument(
+            "--bikes",
+            action="store_true",
+            help="type_id holds MotorBike ids; optional year_from/year_to (or year) columns limit the fit to those model years.",
+        )
         parser.add_argument(
             "--use-bulk",
             action="store_true",
             help="Use bulk_create(ignore_conflicts=True) for faster inserts (no per-row get_or_create).",
         )
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="PostgreSQL only: COPY rows into a staging table and merge them with one INSERT ... ON CONFLICT DO NOTHING. Overrides --use-bulk.",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="PostgreSQL only (implies --copy): treat the CSV as the complete list of vehicles for every product "
+                 "it mentions; relations of those products to other vehicles of the imported type(s) are deleted.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Parse and resolve the file in N processes (byte ranges split on line boundaries; quoted fields "
+                 "must not contain newlines). Rows are written by this process with bulk inserts (implies --use-bulk "
+                 "unless --copy).",
+        )
+        parser.add_argument(
+            "--fuzzy-codes",
+            action="store_true",
+            help="Codes that match no product exactly may also match an EAN or a code without separators "
+                 "(counted separately in the summary). Off by default: unknown codes are skipped.",
+        )
+        parser.add_argument(
+            "--summary-json",
+            metavar="PATH",
+            help="Also write the import summary (counts, phase timings, peak memory) to PATH as JSON.",
+        )
 
     def handle(self, *args, **opts):
+        from catalogue.cache import invalidate_catalogue
         from catalogue.models import ProductVehicle
+        from catalogue.product_index import ProductCodeMap
+        from catalogue.progress import ImportProgress, count_lines
+        from catalogue.profiles import refresh_profiles
+        from catalogue.staging import RelationStager
 
         csv_path: str = opts["csv_path"]
         dry_run: bool = opts["dry_run"]
         prefer: str = opts["prefer"]
-        use_bulk: bool = opts["use_bulk"]
         batch_size: int = opts["batch_size"]
+        bikes: bool = opts["bikes"]
+        sync: bool = opts["sync"]
+        workers: int = opts["workers"]
+        use_copy: bool = opts["copy"] or sync
+        use_bulk: bool = opts["use_bulk"] or workers > 1
+        if use_copy and connection.vendor != "postgresql":
+            raise CommandError("--copy and --sync need a PostgreSQL database.")
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
+        if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            raise CommandError("--workers needs the 'fork' start method (not available on this platform).")
 
         product_models = _product_models()
-        vehicle_models = _vehicle_models()
+        vehicle_models = _vehicle_models(bikes)
+        progress = ImportProgress("relations", write=self.stdout.write, total=max(count_lines(csv_path) - 1, 0))
+
+        # Resolve every row in memory: products by code/EAN and vehicle ids, read up front
+        with progress.phase("lookups"):
+            products = ProductCodeMap(product_models, fuzzy=opts["fuzzy_codes"])
+            vehicle_ids = _vehicle_ids(vehicle_models)
+        self.stdout.write(f"Loaded {len(products)} product codes and {len(vehicle_ids)} vehicle ids")
 
         # Precompute ContentTypes for speed
-        ct_cache = {}
-        def ct_for(model: type[Model]) -> ContentType:
-            if model not in ct_cache:
-                ct_cache[model] = ContentType.objects.get_for_model(model)
-            return ct_cache[model]
+        vehicle_ct_ids = {M: ContentType.objects.get_for_model(M).pk for M in vehicle_models}
+        lookups = dict(products=products, vehicle_ids=vehicle_ids, vehicle_ct_ids=vehicle_ct_ids,
+                       prefer=prefer, bikes=bikes)
 
         # Stats
-        total = 0
+        stats: Counter = Counter()
         created = 0
-        skipped_product_missing = 0
-        skipped_vehicle_missing = 0
         duplicates = 0
         bulk_bucket: List[ProductVehicle] = []
+        touched = set()  # (vehicle_ct_id, vehicle_id) whose fitment profile may change
+        # Fork before the COPY staging table is created: the temp table lives in the
+        # connection opened after close_all()
+        pool = self._fork_pool(workers, lookups) if workers > 1 else None
+        try:
+            stager = RelationStager() if use_copy and not dry_run else None
+        except BaseException:
+            # _resolve_parallel() owns the pool from here on; until then, clean up here
+            if pool is not None:
+                self._stop_pool(pool)
+            raise
 
         def flush_bulk():
             nonlocal created, duplicates, bulk_bucket
@@ -200,68 +374,134 @@ class Command(BaseCommand):
             duplicates += (len(bulk_bucket) - len(res))
             bulk_bucket.clear()
 
-        with open(csv_path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            # normalize headers
-            headers = {h.strip().lower() for h in reader.fieldnames or []}
-            required = {"code", "type_id"}
-            missing = required - headers
-            if missing:
-                raise CommandError(f"CSV missing required columns: {', '.join(sorted(missing))}. Found headers: {sorted(headers)}")
-
-            for row in reader:
-                total += 1
-                self.stdout.write(f"Processing line {total}...")
-                code = (row.get("code") or "").strip()
-                type_raw = (row.get("type_id") or "").strip()
-
-                if not code:
-                    skipped_product_missing += 1
-                    continue
-                try:
-                    type_id = int(type_raw)
-                except ValueError:
-                    skipped_vehicle_missing += 1
-                    continue
-
-                found_product = _find_product_by_code(code, product_models)
-                if not found_product:
-                    skipped_product_missing += 1
-                    continue
-
-                found_vehicles = _find_vehicle_by_id(type_id, vehicle_models, prefer)
-                if not found_vehicles:
-                    skipped_vehicle_missing += 1
-                    continue
-
-                for fv in found_vehicles:
-                    pv_kwargs = dict(
-                        product_ct = ct_for(found_product.model),
-                        product_id = str(found_product.instance.pk),
-                        vehicle_ct = ct_for(fv.model),
-                        vehicle_id = fv.instance.pk,
-                    )
-                    if dry_run:
-                        continue
-                    if use_bulk:
-                        bulk_bucket.append(ProductVehicle(**pv_kwargs))
-                        if len(bulk_bucket) >= batch_size:
-                            flush_bulk()
-                    else:
-                        # safe & clear: honor the unique constraint
-                        obj, was_created = ProductVehicle.objects.get_or_create(**pv_kwargs)
-                        created += int(was_created)
-                        duplicates += int(not was_created)
-
-        if use_bulk and not dry_run:
-            flush_bulk()
+        def write(relation: tuple):
+            nonlocal created, duplicates
+            product_ct_id, product_id, vehicle_ct_id, vehicle_id, year_from, year_to = relation
+            touched.add((vehicle_ct_id, vehicle_id))
+            pv_kwargs = dict(
+                product_ct_id = product_ct_id,
+                product_id = product_id,
+                vehicle_ct_id = vehicle_ct_id,
+                vehicle_id = vehicle_id,
+            )
+            years = dict(year_from=year_from, year_to=year_to)
+            if stager is not None:
+                stager.add(relation)
+            elif use_bulk:
+                bulk_bucket.append(ProductVehicle(**pv_kwargs, **years))
+                if len(bulk_bucket) >= batch_size:
+                    flush_bulk()
+            else:
+                # safe & clear: honor the unique constraint
+                obj, was_created = ProductVehicle.objects.get_or_create(**pv_kwargs, defaults=years)
+                created += int(was_created)
+                duplicates += int(not was_created)
+
+        with progress.phase("rows"):
+            if pool is not None:
+                self._resolve_parallel(pool, csv_path, workers, stats, progress, None if dry_run else write)
+            else:
+                with open(csv_path, newline="", encoding="utf-8") as f:
+                    reader = csv.DictReader(f)
+                    _check_headers(reader.fieldnames)
+
+                    for row in reader:
+                        stats["total"] += 1
+                        progress.advance()
+                        relations, note = _resolve_row(row, **lookups)
+                        if note:
+                            stats[note] += 1
+                        if not dry_run:
+                            for relation in relations:
+                                write(relation)
+
+        sync_counts = None
+        with progress.phase("merge"):
+            if stager is not None and sync:
+                sync_counts = stager.sync(list(vehicle_ct_ids.values()))
+                created = sync_counts["added"]
+            elif stager is not None:
+                created = stager.merge()
+                duplicates = stager.staged - created
+            elif use_bulk and not dry_run:
+                flush_bulk()
+
+        profiles = None
+        if not dry_run:
+            # regroup the imported vehicles by product set, then drop cached catalogue pages
+            # explicitly (bulk_create and COPY bypass post_save)
+            if stager is not None:
+                touched |= stager.removed_vehicles
+            with progress.phase("profiles"):
+                profiles = refresh_profiles(touched)
+                invalidate_catalogue()
 
         self.stdout.write("---- Import summary ----")
-        self.stdout.write(f"Rows read:               {total}")
+        self.stdout.write(f"Rows read:               {stats['total']}")
         self.stdout.write(f"Created relations:       {created}")
-        self.stdout.write(f"Skipped (no product):    {skipped_product_missing}")
-        self.stdout.write(f"Skipped (no vehicle):    {skipped_vehicle_missing}")
-        if not dry_run:
+        self.stdout.write(f"Skipped (no product):    {stats['product']}")
+        self.stdout.write(f"Skipped (no vehicle):    {stats['vehicle']}")
+        if opts["fuzzy_codes"]:
+            self.stdout.write(f"Matched by EAN:          {stats['ean']}")
+            self.stdout.write(f"Matched w/o separators:  {stats['normalized']}")
+        if sync_counts is not None:
+            self.stdout.write(f"Removed relations:       {sync_counts['removed']}")
+            if bikes:
+                self.stdout.write(f"Updated (years):         {sync_counts['updated']}")
+            self.stdout.write(f"Unchanged relations:     {sync_counts['unchanged']}")
+            self.stdout.write(f"Fitment profiles:        {profiles[1]} for {profiles[0]} imported vehicles")
+        elif not dry_run:
             self.stdout.write(f"Duplicates (existing):   {duplicates}")
+            self.stdout.write(f"Fitment profiles:        {profiles[1]} for {profiles[0]} imported vehicles")
         else:
-            self.stdout.write("Dry-run: no changes written.")
\ No newline at end of file
+            self.stdout.write("Dry-run: no changes written.")
+
+        counters = dict(created=created, skipped_no_product=stats["product"], skipped_no_vehicle=stats["vehicle"])
+        if opts["fuzzy_codes"]:
+            counters.update(matched_by_ean=stats["ean"], matched_normalized=stats["normalized"])
+        if sync_counts is not None:
+            counters.update(removed=sync_counts["removed"], updated=sync_counts["updated"],
+                            unchanged=sync_counts["unchanged"])
+        elif not dry_run:
+            counters["duplicates"] = duplicates
+        if profiles is not None:
+            counters.update(profile_vehicles=profiles[0], profiles=profiles[1])
+        progress.finish(opts["summary_json"], counters=counters)
+
+    def _fork_pool(self, workers, lookups):
+        """
+        A fork pool whose workers inherit lookups. Every database connection is closed
+        first (as Django's parallel test runner does), so no worker shares a socket
+        with this process.
+        """
+        global _worker_state
+        _worker_state = lookups
+        connections.close_all()
+        return multiprocessing.get_context("fork").Pool(workers)
+
+    def _resolve_parallel(self, pool, csv_path, workers, stats, progress, write):
+        """
+        Resolve the file in the pool and hand the relations to write() (None for a dry
+        run) in file order, merging the workers' row counters into stats. Closes the pool.
+        """
+        global _worker_state
+        try:
+            with pool:
+                fieldnames, ranges = _byte_ranges(csv_path, max(workers * 4, os.path.getsize(csv_path) // CHUNK_BYTES + 1))
+                _check_headers(fieldnames)
+                tasks = [(csv_path, start, end, fieldnames) for start, end in ranges]
+                # imap keeps file order, so the writer sees rows as a single pass would
+                for relations, chunk_stats in pool.imap(_resolve_chunk, tasks):
+                    stats.update(chunk_stats)
+                    progress.advance(chunk_stats["total"])
+                    if write is not None:
+                        for relation in relations:
+                            write(relation)
+        finally:
+            _worker_state = None
+
+    def _stop_pool(self, pool):
+        global _worker_state
+        pool.terminate()
+        pool.join()
+        _worker_state = None
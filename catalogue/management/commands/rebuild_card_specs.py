@@ -0,0 +1,57 @@
+# catalogue/management/commands/rebuild_card_specs.py
+from django.core.management.base import BaseCommand
+
+from catalogue.cache import invalidate_catalogue
+from catalogue.fitment import PRODUCT_SECTIONS
+
+
+# FOR RUNNING USE:
+# python manage.py rebuild_card_specs
+#
+# Only some product types:
+# python manage.py rebuild_card_specs --model Disc --model Pad
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the stored 'specs' column (what product cards render) for every product. "
+        "Run after imports that bypass Model.save(), e.g. raw SQL or bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            default=[],
+            help="Product model name to rebuild (repeatable). Default: all product models.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        wanted = {m.lower() for m in opts["model"]}
+        batch_size = opts["batch_size"]
+
+        for _, model in PRODUCT_SECTIONS:
+            if wanted and model.__name__.lower() not in wanted:
+                continue
+
+            changed = []
+            total = updated = 0
+            for obj in model.objects.all().iterator(chunk_size=batch_size):
+                total += 1
+                specs = [list(spec) for spec in obj.build_card_specs()]
+                if specs != obj.specs:
+                    obj.specs = specs
+                    changed.append(obj)
+                    updated += 1
+                if len(changed) >= batch_size:
+                    model.objects.bulk_update(changed, ["specs"])
+                    changed.clear()
+            if changed:
+                model.objects.bulk_update(changed, ["specs"])
+
+            self.stdout.write(f"{model.__name__}: {updated} of {total} products updated")
+
+        # bulk_update skips post_save, so drop cached catalogue pages explicitly
+        invalidate_catalogue()
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,26 @@
+# catalogue/management/commands/rebuild_fitment_profiles.py
+from django.core.management.base import BaseCommand
+
+from catalogue.cache import invalidate_catalogue
+from catalogue.profiles import BATCH_SIZE, rebuild_profiles
+
+
+# FOR RUNNING USE:
+# python manage.py rebuild_fitment_profiles
+
+
+class Command(BaseCommand):
+    help = (
+        "Group vehicles with identical compatible products into shared fitment profiles "
+        "(see catalogue/profiles.py). import_relations runs this itself; run it after "
+        "editing ProductVehicle rows by hand or in SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **opts):
+        vehicles, profiles = rebuild_profiles(batch_size=opts["batch_size"])
+        invalidate_catalogue()
+        self.stdout.write(f"{vehicles} vehicles share {profiles} fitment profiles")
+        self.stdout.write(self.style.SUCCESS("Done."))
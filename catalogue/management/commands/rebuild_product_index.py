@@ -0,0 +1,45 @@
+# catalogue/management/commands/rebuild_product_index.py
+from django.core.management.base import BaseCommand
+
+from catalogue.cross_reference import rebuild_pad_references
+from catalogue.fitment import PRODUCT_SECTIONS
+from catalogue.models import Pad
+from catalogue.product_index import rebuild_product_index
+
+
+# FOR RUNNING USE:
+# python manage.py rebuild_product_index
+#
+# Only some product types:
+# python manage.py rebuild_product_index --model Disc --model Pad
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the ProductIndex table (code/EAN lookups) and the PadReference table "
+        "(FMSI/WVA cross-references) from the product tables. "
+        "Run after imports that bypass Model.save(), e.g. raw SQL or bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            default=[],
+            help="Product model name to rebuild (repeatable). Default: all product models.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        wanted = {m.lower() for m in opts["model"]}
+
+        for _, model in PRODUCT_SECTIONS:
+            if wanted and model.__name__.lower() not in wanted:
+                continue
+            indexed = rebuild_product_index(model, batch_size=opts["batch_size"])
+            self.stdout.write(f"{model.__name__}: {indexed} products indexed")
+            if model is Pad:
+                tokens = rebuild_pad_references(batch_size=opts["batch_size"])
+                self.stdout.write(f"Pad: {tokens} FMSI/WVA references indexed")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:52
+
+import re
+
+import catalogue.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+PRODUCT_MODELS = (
+    'Disc', 'Drum', 'Pad', 'PadAccessory', 'Hose', 'WheelCylinder', 'MasterCylinder', 'ClutchCylinder',
+    'ClutchMasterCylinder', 'Caliper', 'ShoeKit', 'Shoe', 'ProportioningValve', 'Kit',
+)
+
+
+def index_existing_products(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ProductIndex = apps.get_model('catalogue', 'ProductIndex')
+    for name in PRODUCT_MODELS:
+        model = apps.get_model('catalogue', name)
+        ct, _ = ContentType.objects.get_or_create(app_label='catalogue', model=name.lower())
+        ProductIndex.objects.bulk_create(
+            [ProductIndex(product_ct=ct, code=code, ean=ean or None,
+                          normalized_code=re.sub(r'[^0-9A-Z]', '', code.upper())[:30])
+             for code, ean in model.objects.values_list('code', 'ean')],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0013_product_specs'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=30)),
+                ('normalized_code', models.CharField(db_index=True, max_length=30)),
+                ('ean', models.CharField(blank=True, db_index=True, max_length=13, null=True)),
+                ('product_ct', models.ForeignKey(limit_choices_to=catalogue.models.product_ct_limit, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name_plural': 'Product Index',
+                'constraints': [models.UniqueConstraint(fields=('code', 'product_ct'), name='uniq_product_index')],
+            },
+        ),
+        migrations.RunPython(index_existing_products, migrations.RunPython.noop),
+    ]
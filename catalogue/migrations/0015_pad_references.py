@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:53
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_existing_pads(apps, schema_editor):
+    # same tokens as catalogue.cross_reference.reference_tokens()
+    Pad = apps.get_model('catalogue', 'Pad')
+    PadReference = apps.get_model('catalogue', 'PadReference')
+    rows = []
+    for pk, fmsi, wva_number in Pad.objects.values_list('pk', 'fmsi', 'wva_number'):
+        for kind, value in (('F', fmsi), ('W', wva_number)):
+            tokens = set()
+            for token in re.findall(r'[A-Z0-9]+(?:-[A-Z0-9]+)?', str(value or '').upper()):
+                if not any(c.isdigit() for c in token):
+                    continue
+                tokens.add(token[:30])
+                base = token.split('-', 1)[0]
+                if base != token and any(c.isdigit() for c in base):
+                    tokens.add(base)
+            rows += [PadReference(pad_id=pk, kind=kind, token=token) for token in sorted(tokens)]
+    PadReference.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0014_product_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PadReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('F', 'FMSI'), ('W', 'WVA')], max_length=1)),
+                ('token', models.CharField(max_length=30)),
+                ('pad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='references', to='catalogue.pad')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('token', 'kind', 'pad'), name='uniq_pad_reference')],
+            },
+        ),
+        migrations.RunPython(index_existing_pads, migrations.RunPython.noop),
+    ]
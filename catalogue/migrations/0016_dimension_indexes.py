@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0015_pad_references'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='caliper',
+            index=models.Index(fields=['diameter_mm', 'num_pistons'], include=('code',), name='caliper_dimensions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disc',
+            index=models.Index(fields=['diameter_mm', 'thickness_th_mm', 'num_holes', 'center_bore_mm'], include=('code',), name='disc_dimensions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drum',
+            index=models.Index(fields=['diameter_mm', 'width_mm', 'num_holes', 'center_bore_mm'], include=('code',), name='drum_dimensions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pad',
+            index=models.Index(fields=['width_mm', 'height_mm', 'thickness_mm'], include=('code',), name='pad_dimensions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoekit',
+            index=models.Index(fields=['diameter_mm', 'width_mm'], include=('code',), name='shoekit_dimensions_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+SEARCH_FIELDS = ('type_label', 'braking_system', 'threading', 'threading_1', 'threading_2', 'fmsi')
+
+# search_vector follows every INSERT/UPDATE, including bulk_create() from imports
+CREATE_TRIGGER = """
+CREATE FUNCTION catalogue_productindex_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', concat_ws(' ', NEW.code, NEW.normalized_code, NEW.ean)), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.search_text, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER catalogue_productindex_search_vector
+    BEFORE INSERT OR UPDATE OF code, normalized_code, ean, search_text ON catalogue_productindex
+    FOR EACH ROW EXECUTE FUNCTION catalogue_productindex_search_vector();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS catalogue_productindex_search_vector ON catalogue_productindex;
+DROP FUNCTION IF EXISTS catalogue_productindex_search_vector();
+"""
+
+
+def fill_search_text(apps, schema_editor):
+    # one set-based UPDATE per product table; the trigger computes search_vector for every row
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ProductIndex = apps.get_model('catalogue', 'ProductIndex')
+    quote = schema_editor.quote_name
+    for ct in ContentType.objects.filter(pk__in=ProductIndex.objects.values('product_ct')):
+        model = apps.get_model(ct.app_label, ct.model)
+        columns = [f.column for f in model._meta.concrete_fields if f.name in SEARCH_FIELDS]
+        text = f"concat_ws(' ', {', '.join(f'p.{quote(c)}' for c in columns)})" if columns else "''"
+        schema_editor.execute(
+            f"UPDATE catalogue_productindex AS i SET search_text = {text} "
+            f"FROM {quote(model._meta.db_table)} AS p WHERE i.product_ct_id = %s AND i.code = p.code",
+            [ct.pk],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0016_dimension_indexes'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productindex',
+            name='search_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='productindex',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='productindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='productindex_search_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:03
+
+import catalogue.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0017_product_search'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FitmentProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=40, unique=True)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FitmentProfileProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.CharField(max_length=30)),
+                ('product_ct', models.ForeignKey(limit_choices_to=catalogue.models.product_ct_limit, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='products', to='catalogue.fitmentprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('profile', 'product_ct', 'product_id'), name='uniq_profile_product')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VehicleProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vehicle_id', models.PositiveIntegerField()),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vehicles', to='catalogue.fitmentprofile')),
+                ('vehicle_ct', models.ForeignKey(limit_choices_to=catalogue.models.vehicle_ct_limit, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('vehicle_ct', 'vehicle_id'), name='uniq_vehicle_profile')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0018_fitment_profiles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productvehicle',
+            name='year_from',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productvehicle',
+            name='year_to',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
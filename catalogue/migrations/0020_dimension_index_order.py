@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0019_productvehicle_years'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='caliper',
+            name='caliper_dimensions_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='disc',
+            name='disc_dimensions_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='drum',
+            name='drum_dimensions_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='pad',
+            name='pad_dimensions_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shoekit',
+            name='shoekit_dimensions_idx',
+        ),
+        migrations.AddIndex(
+            model_name='caliper',
+            index=models.Index(fields=['diameter_mm', 'num_pistons', 'code'], name='caliper_dimensions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disc',
+            index=models.Index(fields=['diameter_mm', 'thickness_th_mm', 'num_holes', 'center_bore_mm', 'code'], include=('min_thickness_mm', 'height_mm'), name='disc_dimensions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drum',
+            index=models.Index(fields=['diameter_mm', 'width_mm', 'num_holes', 'center_bore_mm', 'code'], include=('height_mm', 'max_diameter_mm'), name='drum_dimensions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pad',
+            index=models.Index(fields=['width_mm', 'height_mm', 'thickness_mm', 'code'], name='pad_dimensions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoekit',
+            index=models.Index(fields=['diameter_mm', 'width_mm', 'code'], include=('master_cylinder_diameter_mm',), name='shoekit_dimensions_idx'),
+        ),
+    ]
@@ -3,13 +3,15 @@ from django.db.models import Q
 
 from catalogue.choices import (
     DiscType, Axle, AssemblySide, Material, CaliperPosition,
-    WearIndicator, PadAccessoryType
+    WearIndicator, PadAccessoryType, ReferenceKind
 )
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 from django.apps import apps as django_apps
 from vehicles.models import Car, MotorBike, CommercialVehicle
@@ -29,12 +31,32 @@ class ProductBase(models.Model):
     technical_image_url = models.URLField(blank=True, default="")
     quantity = models.PositiveIntegerField(default=0)
 
+    # build_card_specs() materialised on save, so product cards don't rebuild it per render
+    specs = models.JSONField(default=list, blank=True, editable=False)
+
     class Meta:
         abstract = True  # removed unique_together
 
     def __str__(self):
         return f"{self.code} - {self.ean or ''}".strip(" -")
 
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
+        return []
+
+    @property
+    def card_specs(self) -> list[tuple[str, str, str]]:
+        """
+        (label, value, unit) rows for product_card.html; falls back to building them
+        for rows saved before specs existed (see the rebuild_card_specs command).
+        """
+        return self.specs or self.build_card_specs()
+
+    def save(self, *args, **kwargs):
+        # Partial saves (update_fields) never touch spec fields, e.g. import_prices.
+        if kwargs.get("update_fields") is None:
+            self.specs = [list(spec) for spec in self.build_card_specs()]
+        super().save(*args, **kwargs)
+
 
 class Disc(ProductBase):
     diameter_mm = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
@@ -59,8 +81,15 @@ class Disc(ProductBase):
         related_query_name='disc_links',
     )
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    class Meta:
+        indexes = [
+            # dimension finder (catalogue/dimensions.py): results are paged in key order, and
+            # every other searchable field is included, so the code query is index-only
+            models.Index(fields=["diameter_mm", "thickness_th_mm", "num_holes", "center_bore_mm", "code"],
+                         include=["min_thickness_mm", "height_mm"], name="disc_dimensions_idx"),
+        ]
+
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.diameter_mm:       specs.append(("Diameter", f"{self.diameter_mm}", "mm"))
         if self.thickness_th_mm:   specs.append(("Thickness TH", f"{self.thickness_th_mm}", "mm"))
@@ -103,9 +132,12 @@ class Drum(ProductBase):
                 ),
             ),
         ]
+        indexes = [
+            models.Index(fields=["diameter_mm", "width_mm", "num_holes", "center_bore_mm", "code"],
+                         include=["height_mm", "max_diameter_mm"], name="drum_dimensions_idx"),
+        ]
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.diameter_mm:       specs.append(("Diameter", f"{self.diameter_mm}", "mm"))
         if self.width_mm:          specs.append(("Width", f"{self.width_mm}", "mm"))
@@ -135,8 +167,12 @@ class Pad(ProductBase):
         related_query_name='pad_links',
     )
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    class Meta:
+        indexes = [
+            models.Index(fields=["width_mm", "height_mm", "thickness_mm", "code"], name="pad_dimensions_idx"),
+        ]
+
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.width_mm:               specs.append(("Width", f"{self.width_mm}", "mm"))
         if self.thickness_mm:           specs.append(("Thickness TH", f"{self.thickness_mm}", "mm"))
@@ -167,8 +203,7 @@ class PadAccessory(ProductBase):
     class Meta:
         verbose_name_plural = "Pad Accessories"
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.braking_system:         specs.append(("Braking System", self.braking_system, ""))
         if self.accessory_type:         specs.append(("Accessory", self.get_accessory_type_display(), ""))
@@ -191,8 +226,7 @@ class Hose(ProductBase):
         related_query_name='pad_links',
     )
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.length_mm:              specs.append(("Length", f"{self.length_mm}", "mm"))
         if self.threading_1:            specs.append(("Threading 1", self.threading_1, ""))
@@ -211,8 +245,7 @@ class CylinderBase(ProductBase):
     class Meta:
         abstract = True
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.diameter_mm:               specs.append(("Diameter", f"{self.diameter_mm}", "mm"))
         if self.threading:                 specs.append(("Threading", self.threading, ""))
@@ -282,8 +315,12 @@ class Caliper(ProductBase):
         related_query_name='pad_links',
     )
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    class Meta:
+        indexes = [
+            models.Index(fields=["diameter_mm", "num_pistons", "code"], name="caliper_dimensions_idx"),
+        ]
+
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.diameter_mm:               specs.append(("Diameter", f"{self.diameter_mm}", "mm"))
         if self.num_pistons:               specs.append(("Number of Pistons", f"{self.num_pistons}", "mm"))
@@ -311,8 +348,13 @@ class ShoeKit(ProductBase):
         related_query_name='pad_links',
     )
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    class Meta:
+        indexes = [
+            models.Index(fields=["diameter_mm", "width_mm", "code"], include=["master_cylinder_diameter_mm"],
+                         name="shoekit_dimensions_idx"),
+        ]
+
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.diameter_mm:                    specs.append(("Diameter", f"{self.diameter_mm}", "mm"))
         if self.width_mm:                       specs.append(("Width", f"{self.width_mm}", "mm"))
@@ -341,8 +383,7 @@ class Shoe(ProductBase):
         related_query_name='pad_links',
     )
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.diameter_mm:                    specs.append(("Diameter", f"{self.diameter_mm}", "mm"))
         if self.width_mm:                       specs.append(("Width", f"{self.width_mm}", "mm"))
@@ -365,8 +406,7 @@ class ProportioningValve(ProductBase):
         related_query_name='pad_links',
     )
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.material:              specs.append(("Material", self.get_material_display(), ""))
         if self.braking_system:        specs.append(("Braking System", self.braking_system, ""))
@@ -385,8 +425,7 @@ class Kit(ProductBase):
         related_query_name='pad_links',
     )
 
-    @property
-    def card_specs(self) -> list[tuple[str, str, str]]:
+    def build_card_specs(self) -> list[tuple[str, str, str]]:
         specs = []
         if self.disc_per_box:              specs.append(("Disc per box", f"{self.disc_per_box}", ""))
         if self.pad_per_box:                specs.append(("Pad per box", f"{self.pad_per_box}", ""))
@@ -422,6 +461,10 @@ class ProductVehicle(models.Model):
     vehicle_id = models.PositiveIntegerField()
     vehicle = GenericForeignKey("vehicle_ct", "vehicle_id")
 
+    # motorbikes only: model years the part fits (inclusive); None leaves that side open
+    year_from = models.PositiveSmallIntegerField(null=True, blank=True)
+    year_to = models.PositiveSmallIntegerField(null=True, blank=True)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -438,3 +481,94 @@ class ProductVehicle(models.Model):
 
     def __str__(self):
         return f"{self.product} <-> {self.vehicle}"
+
+
+
+class FitmentProfile(models.Model):
+    """
+    One distinct set of compatible products, shared by every vehicle that fits exactly
+    that set (engine variants of one model usually do). Built from ProductVehicle by
+    catalogue/profiles.py; digest is the SHA-1 of the sorted product set.
+    """
+    digest = models.CharField(max_length=40, unique=True)
+    product_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.product_count} products)"
+
+
+class FitmentProfileProduct(models.Model):
+    profile = models.ForeignKey(FitmentProfile, on_delete=models.CASCADE, related_name="products")
+    product_ct = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name="+",
+                                   limit_choices_to=product_ct_limit)
+    product_id = models.CharField(max_length=30)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["profile", "product_ct", "product_id"], name="uniq_profile_product"),
+        ]
+
+
+class VehicleProfile(models.Model):
+    vehicle_ct = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name="+",
+                                   limit_choices_to=vehicle_ct_limit)
+    vehicle_id = models.PositiveIntegerField()
+    vehicle = GenericForeignKey("vehicle_ct", "vehicle_id")
+    profile = models.ForeignKey(FitmentProfile, on_delete=models.CASCADE, related_name="vehicles")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["vehicle_ct", "vehicle_id"], name="uniq_vehicle_profile"),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle} -> {self.profile}"
+
+class ProductIndex(models.Model):
+    """
+    One row per product from every product table, so a product can be found by code,
+    by code without separators, or by EAN in a single indexed query, and searched as
+    full text (see catalogue/product_index.py). Kept in sync by catalogue/signals.py.
+    """
+    product_ct = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name="+",
+                                   limit_choices_to=product_ct_limit)
+    code = models.CharField(max_length=30)
+    product = GenericForeignKey("product_ct", "code")
+
+    normalized_code = models.CharField(max_length=30, db_index=True)
+    ean = models.CharField(max_length=13, null=True, blank=True, db_index=True)
+
+    # type label, braking system, threading, FMSI (see product_index.SEARCH_FIELDS)
+    search_text = models.TextField(blank=True, default="")
+    # maintained by a database trigger from code/normalized_code/ean (weight A) and search_text (B)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["code", "product_ct"], name="uniq_product_index"),
+        ]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="productindex_search_idx"),
+        ]
+        verbose_name_plural = "Product Index"
+
+    def __str__(self):
+        return f"{self.code} ({self.product_ct.model})"
+
+
+class PadReference(models.Model):
+    """
+    One FMSI or WVA token of a pad: the inverted index behind cross-reference search
+    (see catalogue/cross_reference.py). Rebuilt from Pad.fmsi / Pad.wva_number on save.
+    """
+    pad = models.ForeignKey(Pad, on_delete=models.CASCADE, related_name="references")
+    kind = models.CharField(max_length=1, choices=ReferenceKind.choices)
+    token = models.CharField(max_length=30)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["token", "kind", "pad"], name="uniq_pad_reference"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.token} -> {self.pad_id}"
@@ -0,0 +1,230 @@
+# catalogue/product_index.py
+"""
+Product lookups by code or EAN, and full-text search, across all product tables
+through ProductIndex.
+"""
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import transaction
+from django.db.models import F, Q
+
+from catalogue.models import ProductIndex
+
+_NOT_ALNUM = re.compile(r'[^0-9A-Z]')
+
+# how a ProductIndex row matched the query, best first
+MATCH_CODE, MATCH_EAN, MATCH_NORMALIZED = 'code', 'ean', 'normalized'
+_MATCH_ORDER = (MATCH_CODE, MATCH_EAN, MATCH_NORMALIZED)
+
+# product fields copied into ProductIndex.search_text, where the model has them
+SEARCH_FIELDS = ('type_label', 'braking_system', 'threading', 'threading_1', 'threading_2', 'fmsi')
+# a search ranks at most this many code hits plus this many other matches, so common
+# words stay cheap on a multi-million-row index; deeper pages are not served
+SEARCH_CANDIDATES = 1000
+
+
+def normalize_code(code) -> str:
+    """
+    Upper-case code with separators stripped: "09.a123-10 " -> "09A12310".
+    """
+    return _NOT_ALNUM.sub('', str(code or '').upper())
+
+
+def _search_fields(model) -> list[str]:
+    names = {f.name for f in model._meta.concrete_fields}
+    return [name for name in SEARCH_FIELDS if name in names]
+
+
+def _search_text(values) -> str:
+    return " ".join(str(v) for v in values if v)
+
+
+def _entry_fields(product) -> dict:
+    return {
+        'normalized_code': normalize_code(product.pk)[:30],
+        'ean': product.ean or None,
+        'search_text': _search_text(getattr(product, name) for name in _search_fields(type(product))),
+    }
+
+
+def index_product(product) -> None:
+    ProductIndex.objects.update_or_create(
+        product_ct=ContentType.objects.get_for_model(product), code=product.pk,
+        defaults=_entry_fields(product),
+    )
+
+
+def unindex_product(product) -> None:
+    ProductIndex.objects.filter(product_ct=ContentType.objects.get_for_model(product), code=product.pk).delete()
+
+
+def rebuild_product_index(model, batch_size: int = 1000) -> int:
+    """
+    Replace the index rows of one product model; for imports that bypass save().
+    Returns the number of rows indexed.
+    """
+    ct = ContentType.objects.get_for_model(model)
+    rows = [
+        ProductIndex(product_ct=ct, code=code, normalized_code=normalize_code(code)[:30], ean=ean or None,
+                     search_text=_search_text(texts))
+        for code, ean, *texts in model.objects.values_list(
+            'code', 'ean', *_search_fields(model)).iterator(chunk_size=batch_size)
+    ]
+    with transaction.atomic():
+        ProductIndex.objects.filter(product_ct=ct).delete()
+        ProductIndex.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def match_kind(entry: ProductIndex, query: str) -> str:
+    query = query.strip()
+    if entry.code == query:
+        return MATCH_CODE
+    if entry.ean and entry.ean == query:
+        return MATCH_EAN
+    return MATCH_NORMALIZED
+
+
+def lookup_products(query: str, product_models=None):
+    """
+    ProductIndex rows whose code, separator-free code or EAN equals the query
+    (one query; each condition hits its own index). Unordered; see match_kind().
+    """
+    raw = (query or '').strip()
+    normalized = normalize_code(raw)
+    if not normalized:
+        return ProductIndex.objects.none()
+
+    condition = Q(code=raw) | Q(normalized_code=normalized)
+    if raw.isdigit() and len(raw) <= 13:
+        condition |= Q(ean=raw)
+    entries = ProductIndex.objects.filter(condition)
+    if product_models is not None:
+        cts = ContentType.objects.get_for_models(*product_models).values()
+        entries = entries.filter(product_ct__in=[ct.pk for ct in cts])
+    return entries
+
+
+def find_products(query: str, product_models=None) -> list[ProductIndex]:
+    """
+    lookup_products() evaluated and sorted best match first: exact code, then EAN,
+    then code without separators.
+    """
+    entries = list(lookup_products(query, product_models))
+    entries.sort(key=lambda e: (_MATCH_ORDER.index(match_kind(e, query)), e.code, e.product_ct_id))
+    return entries
+
+
+def find_product(query: str, product_models=None) -> ProductIndex | None:
+    entries = find_products(query, product_models)
+    return entries[0] if entries else None
+
+
+class ProductCodeMap:
+    """
+    Code resolution for bulk imports: ProductIndex is read once into dicts, then every
+    code resolves in memory to (product_ct_id, code).
+
+    By default only exact codes match, and a code present in several product tables
+    resolves to the first of product_models (as the imports always did). With
+    fuzzy=True, match() also falls back to EAN and to the code without separators,
+    like find_product(); callers should report those matches separately.
+    """
+
+    def __init__(self, product_models=None, fuzzy: bool = False):
+        entries = ProductIndex.objects.order_by().values_list('product_ct_id', 'code', 'normalized_code', 'ean')
+        self._rank = {}
+        if product_models is not None:
+            cts = ContentType.objects.get_for_models(*product_models)
+            self._rank = {cts[model].pk: n for n, model in enumerate(product_models)}
+            entries = entries.filter(product_ct__in=list(self._rank))
+
+        self.fuzzy = fuzzy
+        self.by_code, self.by_ean, self.by_normalized = {}, {}, {}
+        for product_ct_id, code, normalized, ean in entries.iterator(chunk_size=10000):
+            target = (product_ct_id, code)
+            self._keep(self.by_code, code, target)
+            if fuzzy:
+                self._keep(self.by_normalized, normalized, target)
+                if ean:
+                    self._keep(self.by_ean, ean, target)
+
+    def _keep(self, index, key, target):
+        """Keep the target of the earliest product model (then the lowest code)."""
+        current = index.get(key)
+        if current is None or self._order(target) < self._order(current):
+            index[key] = target
+
+    def _order(self, target):
+        return self._rank.get(target[0], target[0]), target[1]
+
+    def __len__(self):
+        return len(self.by_code)
+
+    def match(self, code: str) -> tuple[tuple[int, str] | None, str | None]:
+        """
+        ((product_ct_id, code), MATCH_CODE / MATCH_EAN / MATCH_NORMALIZED), or (None, None).
+        """
+        raw = (code or '').strip()
+        if not raw:
+            return None, None
+        found = self.by_code.get(raw)
+        if found is not None:
+            return found, MATCH_CODE
+        if not self.fuzzy:
+            return None, None
+        if raw.isdigit() and len(raw) <= 13:
+            found = self.by_ean.get(raw)
+            if found is not None:
+                return found, MATCH_EAN
+        found = self.by_normalized.get(normalize_code(raw))
+        if found is not None:
+            return found, MATCH_NORMALIZED
+        return None, None
+
+    def find(self, code: str) -> tuple[int, str] | None:
+        return self.match(code)[0]
+
+
+def search_query(text: str, weights: str = '') -> SearchQuery | None:
+    """
+    Every word must match, the last one as a prefix (typeahead): "ate d76" -> 'ate' & 'd76':*
+    Several words may also be one part number typed with separators ("P 85 041"), so their
+    concatenation is tried against the separator-free code as well.
+    With weights="A" the words must match the code, separator-free code or EAN.
+    """
+    words = re.findall(r'[0-9a-z]+', (text or '').lower())
+    if not words:
+        return None
+    label = f":{weights}" if weights else ""
+    terms = " & ".join([f"'{w}'{label}" for w in words[:-1]] + [f"'{words[-1]}':*{weights}"])
+    if len(words) > 1:
+        terms = f"({terms}) | '{''.join(words)}':*{weights}"
+    return SearchQuery(terms, config='simple', search_type='raw')
+
+
+def search_products(text: str, limit: int = 20, offset: int = 0):
+    """
+    Full-text search over ProductIndex.search_vector (GIN index), best match first.
+    Returns (entries, has_more); entries carry a .rank annotation.
+
+    Only a bounded candidate set is ranked: up to SEARCH_CANDIDATES rows whose code,
+    separator-free code or EAN matches (these rank highest, so they are never cut off)
+    and up to SEARCH_CANDIDATES matches of any kind. A common word thus costs two
+    limited GIN scans instead of ranking every row that contains it.
+    """
+    query = search_query(text)
+    if query is None:
+        return [], False
+    code_hits = ProductIndex.objects.filter(search_vector=search_query(text, weights='A'))
+    matches = ProductIndex.objects.filter(search_vector=query)
+    candidates = code_hits.values('pk')[:SEARCH_CANDIDATES].union(matches.values('pk')[:SEARCH_CANDIDATES])
+    entries = list(
+        ProductIndex.objects.filter(pk__in=candidates)
+        .defer('search_text', 'search_vector')
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', 'code')[offset:offset + limit + 1]
+    )
+    return entries[:limit], len(entries) > limit
@@ -0,0 +1,161 @@
+# catalogue/profiles.py
+"""
+Fitment profiles: vehicles with exactly the same compatible products share one
+FitmentProfile, so the catalogue payload is built and cached once per distinct
+product set instead of once per vehicle (see catalogue.cache.fitment_version).
+
+ProductVehicle stays the source of truth. Profiles are derived from it:
+refresh_profiles() recomputes the vehicles a relations import touched, reusing
+profiles by digest, and rebuild_profiles() (the rebuild_fitment_profiles command)
+recomputes every vehicle. A vehicle whose relations are edited one by one loses
+its profile until then and is cached on its own meanwhile. Motorbikes with
+year-limited fitments never get a profile, since their parts depend on the model year.
+"""
+import functools
+import hashlib
+from collections import defaultdict
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Q
+
+from catalogue.models import ProductVehicle, FitmentProfile, FitmentProfileProduct, VehicleProfile
+
+BATCH_SIZE = 5000
+
+
+def profile_digest(products) -> str:
+    """SHA-1 of a set of (product_ct_id, product_id) pairs, independent of order."""
+    lines = sorted(f"{product_ct_id}:{product_id}" for product_ct_id, product_id in products)
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def drop_vehicle_profile(vehicle_ct_id, vehicle_id) -> None:
+    VehicleProfile.objects.filter(vehicle_ct_id=vehicle_ct_id, vehicle_id=vehicle_id).delete()
+
+
+def _profile_rows(rows):
+    """
+    (vehicle_ct_id, vehicle_id, digest, products) per vehicle from ProductVehicle rows
+    ordered by vehicle; vehicles with year-limited rows are left out.
+    """
+    for vehicle, group in groupby(rows, key=lambda row: row[:2]):
+        group = list(group)
+        if any(row[4] is not None or row[5] is not None for row in group):
+            continue
+        products = [row[2:4] for row in group]
+        yield (*vehicle, profile_digest(products), products)
+
+
+def _assign(profiles, batch_size) -> list[tuple[int, int, int]]:
+    """
+    [(vehicle_ct_id, vehicle_id, profile_id)] for _profile_rows() output, creating the
+    profiles whose digest does not exist yet.
+    """
+    digests = list({digest for _, _, digest, _ in profiles})
+    existing = {}
+    for start in range(0, len(digests), batch_size):
+        existing.update(FitmentProfile.objects.filter(digest__in=digests[start:start + batch_size])
+                        .values_list("digest", "pk"))
+    new = {}  # digest -> products, for sets no profile holds yet
+    for _, _, digest, products in profiles:
+        if digest not in existing:
+            new.setdefault(digest, products)
+
+    FitmentProfile.objects.bulk_create(
+        [FitmentProfile(digest=digest, product_count=len(products)) for digest, products in new.items()],
+        batch_size=batch_size,
+    )
+    created = list(new)
+    for start in range(0, len(created), batch_size):
+        existing.update(FitmentProfile.objects.filter(digest__in=created[start:start + batch_size])
+                        .values_list("digest", "pk"))
+    FitmentProfileProduct.objects.bulk_create(
+        (FitmentProfileProduct(profile_id=existing[digest], product_ct_id=product_ct_id, product_id=product_id)
+         for digest, products in new.items() for product_ct_id, product_id in products),
+        batch_size=batch_size,
+    )
+    return [(vehicle_ct_id, vehicle_id, existing[digest]) for vehicle_ct_id, vehicle_id, digest, _ in profiles]
+
+
+_ROW_FIELDS = ("vehicle_ct_id", "vehicle_id", "product_ct_id", "product_id", "year_from", "year_to")
+
+
+def rebuild_profiles(batch_size: int = BATCH_SIZE) -> tuple[int, int]:
+    """
+    Recompute every vehicle's profile from ProductVehicle in one ordered pass, create the
+    profiles that do not exist yet and drop the ones no vehicle uses any more.
+    Returns (vehicles, profiles).
+    """
+    from catalogue.cache import invalidate_profiles
+
+    rows = (ProductVehicle.objects
+            .order_by("vehicle_ct_id", "vehicle_id")
+            .values_list(*_ROW_FIELDS)
+            .iterator(chunk_size=batch_size))
+    profiles = list(_profile_rows(rows))
+
+    with transaction.atomic():
+        assignments = _assign(profiles, batch_size)
+        VehicleProfile.objects.all().delete()
+        VehicleProfile.objects.bulk_create(
+            (VehicleProfile(vehicle_ct_id=vehicle_ct_id, vehicle_id=vehicle_id, profile_id=profile_id)
+             for vehicle_ct_id, vehicle_id, profile_id in assignments),
+            batch_size=batch_size,
+        )
+        FitmentProfile.objects.filter(vehicles__isnull=True).delete()
+        transaction.on_commit(invalidate_profiles)
+
+    return len(assignments), len({profile_id for _, _, profile_id in assignments})
+
+
+def _vehicles_q(vehicles) -> Q:
+    ids_by_ct = defaultdict(list)
+    for vehicle_ct_id, vehicle_id in vehicles:
+        ids_by_ct[vehicle_ct_id].append(vehicle_id)
+    condition = Q(pk__in=[])
+    for vehicle_ct_id, ids in ids_by_ct.items():
+        condition |= Q(vehicle_ct_id=vehicle_ct_id, vehicle_id__in=ids)
+    return condition
+
+
+def _invalidate_vehicles(vehicles) -> None:
+    from catalogue.cache import invalidate_vehicle
+
+    for vehicle_ct_id, vehicle_id in vehicles:
+        invalidate_vehicle(vehicle_ct_id, vehicle_id)
+
+
+def refresh_profiles(vehicles, batch_size: int = BATCH_SIZE) -> tuple[int, int]:
+    """
+    Recompute the profiles of the given (vehicle_ct_id, vehicle_id) pairs only, e.g. the
+    vehicles an import touched: existing profiles are reused by digest, missing ones
+    created, and profiles no vehicle uses any more dropped. Only the touched
+    vehicles' cached profile lookups are invalidated. Returns (vehicles, profiles)
+    among the touched vehicles.
+    """
+    vehicles = sorted(set(vehicles))
+    assigned, profile_ids = 0, set()
+    for start in range(0, len(vehicles), batch_size):
+        batch = vehicles[start:start + batch_size]
+        condition = _vehicles_q(batch)
+        rows = (ProductVehicle.objects.filter(condition)
+                .order_by("vehicle_ct_id", "vehicle_id")
+                .values_list(*_ROW_FIELDS))
+        profiles = list(_profile_rows(rows))
+
+        with transaction.atomic():
+            assignments = _assign(profiles, batch_size)
+            VehicleProfile.objects.filter(condition).delete()
+            VehicleProfile.objects.bulk_create(
+                [VehicleProfile(vehicle_ct_id=vehicle_ct_id, vehicle_id=vehicle_id, profile_id=profile_id)
+                 for vehicle_ct_id, vehicle_id, profile_id in assignments],
+                batch_size=batch_size,
+            )
+            transaction.on_commit(functools.partial(_invalidate_vehicles, batch))
+
+        assigned += len(assignments)
+        profile_ids.update(profile_id for _, _, profile_id in assignments)
+    # also catches profiles left behind by drop_vehicle_profile()
+    FitmentProfile.objects.filter(vehicles__isnull=True).delete()
+    return assigned, len(profile_ids)
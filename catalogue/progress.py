@@ -0,0 +1,141 @@
+# catalogue/progress.py
+"""
+Progress reporting shared by the imports: import_relations, import_prices,
+import_vehicle_data and the admin product imports (catalogue.import_recources).
+
+A line per row costs more terminal I/O than the row itself costs to import on large
+files, so progress is written at most once every IMPORT_PROGRESS_INTERVAL seconds:
+rows done, rows/s, the ETA when the total is known and the running phase.
+finish() adds per-phase timings and peak memory, and can write the same numbers
+to a JSON file for scripts.
+"""
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak memory is left out
+    resource = None
+
+COUNT_BUFFER_BYTES = 1024 * 1024
+
+
+def count_lines(path) -> int:
+    """Newline count of a file, read in binary blocks (header included)."""
+    lines = 0
+    with open(path, "rb") as f:
+        while block := f.read(COUNT_BUFFER_BYTES):
+            lines += block.count(b"\n")
+    return lines
+
+
+def peak_memory_mb() -> float | None:
+    """Peak resident memory of this process or its largest finished child, in MB."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, seconds = divmod(int(seconds), 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+class ImportProgress:
+    """
+    Throttled row counter with named, timed phases.
+
+        progress = ImportProgress("prices", write=self.stdout.write, total=len(rows))
+        with progress.phase("apply"):
+            for row in rows:
+                ...
+                progress.advance()
+        progress.finish(opts["summary_json"], counters={"updated": updated})
+    """
+
+    def __init__(self, name: str, write=print, total: int | None = None, interval: float | None = None):
+        self.name = name
+        self.write = write
+        self.total = total
+        self.interval = settings.IMPORT_PROGRESS_INTERVAL if interval is None else interval
+        self.done = 0
+        self.phases = {}  # phase -> seconds, in the order they first ran
+        self.current = None
+        self.started = time.monotonic()
+        self._next_report = self.started + self.interval
+
+    @contextmanager
+    def phase(self, name: str):
+        previous, self.current = self.current, name
+        started = time.monotonic()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.monotonic() - started
+            self.current = previous
+
+    def advance(self, rows: int = 1) -> None:
+        self.done += rows
+        now = time.monotonic()
+        if now >= self._next_report:
+            self._next_report = now + self.interval
+            self.write(self.status(now))
+
+    def status(self, now: float | None = None) -> str:
+        now = time.monotonic() if now is None else now
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        line = f"[{self.name}] {self.done}"
+        if self.total:
+            line += f"/{self.total} ({100 * self.done / self.total:.0f}%)"
+        line += f" rows, {rate:,.0f} rows/s"
+        if self.total and rate and self.done < self.total:
+            line += f", ETA {_duration((self.total - self.done) / rate)}"
+        if self.current:
+            line += f" - {self.current}"
+        return line
+
+    def summary(self, counters: dict | None = None) -> dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            "import": self.name,
+            "rows": self.done,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(self.done / elapsed, 1) if elapsed > 0 else None,
+            "phases_s": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "peak_memory_mb": peak_memory_mb(),
+            "counters": dict(counters or {}),
+        }
+
+    def finish(self, json_path=None, counters: dict | None = None) -> dict:
+        """
+        Write the totals (and per-phase timings, peak memory) and, with json_path,
+        the summary() dict as JSON. Returns the summary.
+        """
+        summary = self.summary(counters)
+        line = f"[{self.name}] {summary['rows']} rows in {_duration(summary['elapsed_s'])}"
+        if summary["rows_per_s"] is not None:
+            line += f" ({summary['rows_per_s']:,.0f} rows/s)"
+        if summary["peak_memory_mb"] is not None:
+            line += f", peak memory {summary['peak_memory_mb']:,.0f} MB"
+        self.write(line)
+        if self.phases:
+            self.write(f"[{self.name}] phases: " + ", ".join(
+                f"{name} {_duration(seconds)}" for name, seconds in self.phases.items()))
+        if json_path:
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            self.write(f"[{self.name}] summary written to {json_path}")
+        return summary
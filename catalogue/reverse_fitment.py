@@ -0,0 +1,104 @@
+# catalogue/reverse_fitment.py
+"""
+Vehicles a product fits, a page at a time, ordered brand -> model -> type.
+
+Each vehicle table is read with one query that semi-joins ProductVehicle through its
+(product_ct, product_id, vehicle_ct, vehicle_id) unique index, which covers the lookup.
+Pages continue from a cursor (the sort key of the last row) rather than an OFFSET,
+so the last page of a disc fitting thousands of vehicles costs the same as the first.
+"""
+import base64
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from catalogue.models import ProductVehicle
+from vehicles.models import Car, CommercialVehicle, MotorBike
+from vehicles.serializers import month_year
+
+# (vehicle model, sort key, extra columns) in page order
+VEHICLE_TABLES = (
+    (Car, ('brand__name', 'model__name', 'name', 'pk'), ('name', 'kw', 'cv', 'date_start', 'date_end')),
+    (CommercialVehicle, ('brand__name', 'model__name', 'name', 'pk'), ('name', 'kw', 'cv', 'date_start', 'date_end')),
+    (MotorBike, ('brand__name', 'model__name', 'displacement', 'pk'), ('displacement',)),
+)
+_TYPE_ORDER = [model.TYPE_CODE for model, _, _ in VEHICLE_TABLES]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(type_code, key) -> str:
+    return base64.urlsafe_b64encode(json.dumps([type_code, *key], separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        type_code, *key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor.")
+    if type_code not in _TYPE_ORDER or len(key) != 4:
+        raise InvalidCursor("Invalid cursor.")
+    return type_code, key
+
+
+def _after(fields, key) -> Q:
+    """(f1, f2, ...) > (k1, k2, ...) as OR-ed equality prefixes."""
+    condition = Q()
+    for i, field in enumerate(fields):
+        condition |= Q(**{f: v for f, v in zip(fields[:i], key[:i])}, **{f"{field}__gt": key[i]})
+    return condition
+
+
+def _row(values, extra) -> dict:
+    row = {'id': values['pk']}
+    for field in extra:
+        row[field] = values[field]
+    if 'date_start' in row:
+        row['date_start'] = month_year(row['date_start'], '?')
+        row['date_end'] = month_year(row['date_end'], 'now')
+    return row
+
+
+def vehicles_for_product(product_ct, product_id, cursor=None, limit=100):
+    """
+    Up to limit vehicles the product fits, after cursor. Returns (groups, next_cursor) where
+    groups are {vehicle_type, brand, model, vehicles} runs of consecutive rows.
+    """
+    start_type, start_key = decode_cursor(cursor) if cursor else (_TYPE_ORDER[0], None)
+    links = ProductVehicle.objects.filter(product_ct=product_ct, product_id=product_id)
+
+    rows = []
+    last = None
+    for model, sort, extra in VEHICLE_TABLES[_TYPE_ORDER.index(start_type):]:
+        remaining = limit + 1 - len(rows)
+        if remaining <= 0:
+            break
+        vehicle_ct = ContentType.objects.get_for_model(model, for_concrete_model=False)
+        qs = model.objects.filter(pk__in=links.filter(vehicle_ct=vehicle_ct).values('vehicle_id'))
+        if start_key is not None and model.TYPE_CODE == start_type:
+            qs = qs.filter(_after(sort, start_key))
+        for values in qs.order_by(*sort).values(*sort, 'brand_id', 'model_id', *extra)[:remaining]:
+            rows.append((model.TYPE_CODE, values, sort, extra))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        type_code, values, sort, _ = rows[-1]
+        next_cursor = encode_cursor(type_code, [values[f] for f in sort])
+
+    groups = []
+    for type_code, values, _, extra in rows:
+        key = (type_code, values['brand_id'], values['model_id'])
+        if last != key:
+            groups.append({
+                'vehicle_type': type_code,
+                'brand': {'id': values['brand_id'], 'name': values['brand__name']},
+                'model': {'id': values['model_id'], 'name': values['model__name']},
+                'vehicles': [],
+            })
+            last = key
+        groups[-1]['vehicles'].append(_row(values, extra))
+    return groups, next_cursor
@@ -0,0 +1,35 @@
+from rest_framework import serializers
+
+
+class ProductSerializer(serializers.Serializer):
+    """
+    Fields shared by every ProductBase subclass, plus the prebuilt card specs.
+    """
+    code = serializers.CharField()
+    ean = serializers.CharField(allow_null=True)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    available = serializers.BooleanField()
+    quantity = serializers.IntegerField()
+    type_label = serializers.CharField()
+    image_url = serializers.CharField()
+    technical_image_url = serializers.CharField()
+    specs = serializers.SerializerMethodField()
+
+    def get_specs(self, obj):
+        return [{'label': label, 'value': value, 'unit': unit} for label, value, unit in obj.card_specs]
+
+
+def serialize_fitment(products) -> list[dict]:
+    """
+    [(title, items), ...] from the fitment resolver -> JSON groups, skipping empty sections.
+    """
+    groups = []
+    for title, items in products:
+        if not items:
+            continue
+        groups.append({
+            'type': items[0]._meta.model_name,
+            'title': title,
+            'items': ProductSerializer(items, many=True).data,
+        })
+    return groups
@@ -0,0 +1,54 @@
+# catalogue/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from catalogue.cache import invalidate_vehicle, invalidate_catalogue
+from catalogue.fitment import PRODUCT_SECTIONS
+from catalogue.cross_reference import index_pad_references
+from catalogue.models import ProductVehicle, Pad
+from catalogue.product_index import SEARCH_FIELDS, index_product, unindex_product
+from catalogue.profiles import drop_vehicle_profile
+
+
+def product_vehicle_changed(sender, instance, **kwargs):
+    # the vehicle no longer matches its profile; it is reassigned by the next rebuild_profiles().
+    # After commit, so a rolled-back change keeps the profile and readers can't re-cache old rows.
+    vehicle_ct_id, vehicle_id = instance.vehicle_ct_id, instance.vehicle_id
+
+    def changed():
+        drop_vehicle_profile(vehicle_ct_id, vehicle_id)
+        invalidate_vehicle(vehicle_ct_id, vehicle_id)
+
+    transaction.on_commit(changed)
+
+
+def product_changed(sender, instance, **kwargs):
+    # A product can be listed for thousands of vehicles; bump the catalogue-wide version.
+    invalidate_catalogue()
+
+
+def product_saved_index(sender, instance, update_fields=None, **kwargs):
+    # partial saves (e.g. import_prices) rarely touch indexed fields
+    if update_fields is None or {"ean", *SEARCH_FIELDS} & set(update_fields):
+        index_product(instance)
+
+
+def product_deleted_index(sender, instance, **kwargs):
+    unindex_product(instance)
+
+
+def pad_saved_references(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"fmsi", "wva_number"} & set(update_fields):
+        index_pad_references(instance)
+
+
+def connect_signals():
+    post_save.connect(product_vehicle_changed, sender=ProductVehicle, dispatch_uid="catalogue_pv_saved")
+    post_delete.connect(product_vehicle_changed, sender=ProductVehicle, dispatch_uid="catalogue_pv_deleted")
+    for _, model in PRODUCT_SECTIONS:
+        post_save.connect(product_changed, sender=model, dispatch_uid=f"catalogue_{model.__name__}_saved")
+        post_delete.connect(product_changed, sender=model, dispatch_uid=f"catalogue_{model.__name__}_deleted")
+        post_save.connect(product_saved_index, sender=model, dispatch_uid=f"catalogue_{model.__name__}_indexed")
+        post_delete.connect(product_deleted_index, sender=model, dispatch_uid=f"catalogue_{model.__name__}_unindexed")
+    # PadReference rows go with the pad (on_delete=CASCADE)
+    post_save.connect(pad_saved_references, sender=Pad, dispatch_uid="catalogue_pad_references")
@@ -0,0 +1,156 @@
+# catalogue/staging.py
+"""
+COPY-based loading of ProductVehicle rows (Postgres only).
+
+Resolved relations are streamed with COPY FROM STDIN into a session temp table,
+then merged into catalogue_productvehicle by a single INSERT ... SELECT ... ON
+CONFLICT DO NOTHING RETURNING, so the number of new rows (and with it the number
+of duplicates) is exact instead of guessed from bulk_create() results.
+
+sync() instead treats the staged rows as the complete fitment list of the products
+they mention: the diff against ProductVehicle is taken with set operations in SQL,
+so neither side is ever loaded into Python.
+"""
+import io
+
+from django.db import connection, transaction
+
+from catalogue.models import ProductVehicle
+
+STAGING_TABLE = "productvehicle_staging"
+# (column, SQL type) in COPY order
+STAGING_COLUMNS = (
+    ("product_ct_id", "integer"),
+    ("product_id", "varchar(30)"),
+    ("vehicle_ct_id", "integer"),
+    ("vehicle_id", "integer"),
+    ("year_from", "smallint"),
+    ("year_to", "smallint"),
+)
+COPY_CHUNK_ROWS = 50000
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    return str(value).translate(_ESCAPES)
+
+
+class RelationStager:
+    """
+    Collects (product_ct_id, product_id, vehicle_ct_id, vehicle_id, year_from, year_to)
+    rows and COPYs them into the staging table every COPY_CHUNK_ROWS rows.
+
+        stager = RelationStager()
+        for row in rows:
+            stager.add(row)
+        inserted = stager.merge()       # or: counts = stager.sync(vehicle_ct_ids)
+    """
+
+    def __init__(self, table: str = STAGING_TABLE, chunk_rows: int = COPY_CHUNK_ROWS):
+        if connection.vendor != "postgresql":
+            raise RuntimeError("COPY staging needs PostgreSQL.")
+        self.table = connection.ops.quote_name(table)
+        self.chunk_rows = chunk_rows
+        self.staged = 0
+        self.removed_vehicles = set()
+        self._buffer = io.StringIO()
+        self._pending = 0
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in STAGING_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+            cursor.execute(f"CREATE TEMP TABLE {self.table} ({columns})")
+
+    def add(self, row):
+        self._buffer.write("\t".join(_copy_value(value) for value in row))
+        self._buffer.write("\n")
+        self._pending += 1
+        if self._pending >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._buffer.seek(0)
+        columns = ", ".join(name for name, _ in STAGING_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {self.table} ({columns}) FROM STDIN", self._buffer)
+        self.staged += self._pending
+        self._buffer = io.StringIO()
+        self._pending = 0
+
+    def _insert(self, cursor) -> int:
+        columns = ", ".join(name for name, _ in STAGING_COLUMNS)
+        cursor.execute(
+            f"WITH inserted AS ("
+            f" INSERT INTO {_target()} ({columns})"
+            f" SELECT {columns} FROM {self.table}"
+            f" ON CONFLICT (product_ct_id, product_id, vehicle_ct_id, vehicle_id) DO NOTHING"
+            f" RETURNING 1"
+            f") SELECT count(*) FROM inserted"
+        )
+        return cursor.fetchone()[0]
+
+    def merge(self) -> int:
+        """
+        Insert the staged rows that are not in ProductVehicle yet; returns how many were
+        inserted (staged - inserted rows were duplicates). Drops the staging table.
+        """
+        self.flush()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {self.table}")
+            inserted = self._insert(cursor)
+            cursor.execute(f"DROP TABLE {self.table}")
+        return inserted
+
+    def sync(self, vehicle_ct_ids) -> dict[str, int]:
+        """
+        Make ProductVehicle match the staged rows for every staged product, among the
+        vehicles of vehicle_ct_ids: delete the pairs missing from the staging table,
+        update changed year ranges and insert the new pairs, in one transaction.
+        Returns {added, removed, updated, unchanged}; the vehicles that lost relations
+        are left in self.removed_vehicles. Drops the staging table.
+        """
+        self.flush()
+        target = _target()
+        same_pair = ("s.product_ct_id = t.product_ct_id AND s.product_id = t.product_id"
+                     " AND s.vehicle_ct_id = t.vehicle_ct_id AND s.vehicle_id = t.vehicle_id")
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {self.table}")
+            cursor.execute(
+                f"SELECT count(*) FROM (SELECT DISTINCT product_ct_id, product_id, vehicle_ct_id, vehicle_id"
+                f" FROM {self.table}) pairs"
+            )
+            pairs = cursor.fetchone()[0]
+
+            cursor.execute(
+                f"DELETE FROM {target} t"
+                f" USING (SELECT DISTINCT product_ct_id, product_id FROM {self.table}) p"
+                f" WHERE t.product_ct_id = p.product_ct_id AND t.product_id = p.product_id"
+                f" AND t.vehicle_ct_id = ANY(%s)"
+                f" AND NOT EXISTS (SELECT 1 FROM {self.table} s WHERE {same_pair})"
+                f" RETURNING t.vehicle_ct_id, t.vehicle_id",
+                [list(vehicle_ct_ids)],
+            )
+            removed_from = cursor.fetchall()
+            removed = len(removed_from)
+            self.removed_vehicles = set(removed_from)
+
+            cursor.execute(
+                f"UPDATE {target} t SET year_from = s.year_from, year_to = s.year_to"
+                f" FROM (SELECT DISTINCT ON (product_ct_id, product_id, vehicle_ct_id, vehicle_id) *"
+                f" FROM {self.table}) s"
+                f" WHERE {same_pair}"
+                f" AND (t.year_from IS DISTINCT FROM s.year_from OR t.year_to IS DISTINCT FROM s.year_to)"
+            )
+            updated = cursor.rowcount
+
+            added = self._insert(cursor)
+            cursor.execute(f"DROP TABLE {self.table}")
+        return {"added": added, "removed": removed, "updated": updated, "unchanged": pairs - added - updated}
+
+
+def _target() -> str:
+    return connection.ops.quote_name(ProductVehicle._meta.db_table)
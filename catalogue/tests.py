@@ -1,3 +1,142 @@
-from django.test import TestCase
+import os
+import tempfile
 
-# Create your tests here.
+from django.contrib.contenttypes.models import ContentType
+from django.test import SimpleTestCase, TestCase
+
+from .management.commands.import_relations import _byte_ranges
+from .models import Disc, Pad, ProductIndex
+from .product_index import (
+    MATCH_CODE, MATCH_EAN, MATCH_NORMALIZED, ProductCodeMap, normalize_code, search_query,
+)
+from .reverse_fitment import InvalidCursor, decode_cursor, encode_cursor
+
+
+class NormalizeCodeTests(SimpleTestCase):
+    def test_strips_separators_and_upper_cases(self):
+        self.assertEqual(normalize_code("09.a123-10 "), "09A12310")
+        self.assertEqual(normalize_code("p 85 041"), "P85041")
+        self.assertEqual(normalize_code("DF4294/S"), "DF4294S")
+
+    def test_empty_values(self):
+        self.assertEqual(normalize_code(None), "")
+        self.assertEqual(normalize_code(" -./ "), "")
+
+    def test_non_strings(self):
+        self.assertEqual(normalize_code(12345), "12345")
+
+
+class SearchQueryTests(SimpleTestCase):
+    def terms(self, text, **kwargs):
+        return search_query(text, **kwargs).get_source_expressions()[-1].value
+
+    def test_last_word_is_a_prefix(self):
+        self.assertEqual(self.terms("D76"), "'d76':*")
+
+    def test_words_are_also_tried_as_one_code(self):
+        self.assertEqual(self.terms("ate d76"), "('ate' & 'd76':*) | 'ated76':*")
+
+    def test_weights_restrict_to_code_fields(self):
+        self.assertEqual(self.terms("ate d76", weights="A"), "('ate':A & 'd76':*A) | 'ated76':*A")
+
+    def test_punctuation_cannot_reach_the_tsquery(self):
+        self.assertEqual(self.terms("p'85 & !041"), "('p' & '85' & '041':*) | 'p85041':*")
+        self.assertIsNone(search_query(" &|! "))
+
+
+class ProductCodeMapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.disc_ct = ContentType.objects.get_for_model(Disc).pk
+        cls.pad_ct = ContentType.objects.get_for_model(Pad).pk
+        ProductIndex.objects.bulk_create([
+            ProductIndex(product_ct_id=cls.disc_ct, code="09.A123-10", normalized_code="09A12310", ean="4006633123456"),
+            ProductIndex(product_ct_id=cls.disc_ct, code="DF4294", normalized_code="DF4294"),
+            ProductIndex(product_ct_id=cls.pad_ct, code="DF4294", normalized_code="DF4294"),
+        ])
+
+    def test_exact_codes_only_by_default(self):
+        codes = ProductCodeMap([Disc, Pad])
+        self.assertEqual(codes.match(" 09.A123-10 "), ((self.disc_ct, "09.A123-10"), MATCH_CODE))
+        self.assertEqual(codes.match("09A12310"), (None, None))
+        self.assertEqual(codes.match("4006633123456"), (None, None))
+        self.assertEqual(codes.match(""), (None, None))
+
+    def test_shared_code_resolves_to_the_first_product_model(self):
+        self.assertEqual(ProductCodeMap([Disc, Pad]).find("DF4294"), (self.disc_ct, "DF4294"))
+        self.assertEqual(ProductCodeMap([Pad, Disc]).find("DF4294"), (self.pad_ct, "DF4294"))
+
+    def test_product_models_limit_the_lookup(self):
+        codes = ProductCodeMap([Pad])
+        self.assertEqual(len(codes), 1)
+        self.assertIsNone(codes.find("09.A123-10"))
+
+    def test_fuzzy_falls_back_to_ean_and_separator_free_code(self):
+        codes = ProductCodeMap([Disc, Pad], fuzzy=True)
+        self.assertEqual(codes.match("4006633123456"), ((self.disc_ct, "09.A123-10"), MATCH_EAN))
+        self.assertEqual(codes.match("09 a123 10"), ((self.disc_ct, "09.A123-10"), MATCH_NORMALIZED))
+        self.assertEqual(codes.match("DF4294"), ((self.disc_ct, "DF4294"), MATCH_CODE))
+
+
+class ReverseFitmentCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        key = ["VOLKSWAGEN", "GOLF IV", "1.9 TDI", 101]
+        cursor = encode_cursor("c", key)
+        self.assertEqual(decode_cursor(cursor), ("c", key))
+
+    def test_cursor_is_url_safe(self):
+        # standard base64 of this key contains "+"
+        cursor = encode_cursor("b", ["HONDA", "CBR ??>>", 600, 7])
+        self.assertNotRegex(cursor, r"[+/]")
+        self.assertEqual(decode_cursor(cursor), ("b", ["HONDA", "CBR ??>>", 600, 7]))
+
+    def test_invalid_cursors(self):
+        for cursor in ("", "not base64!", encode_cursor("x", ["A", "B", "C", 1]), encode_cursor("c", ["A", 1])):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    decode_cursor(cursor)
+
+
+class ByteRangesTests(SimpleTestCase):
+    HEADER = "code,type_id,year\n"
+
+    def write_csv(self, text):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def read(self, path, ranges):
+        with open(path, "rb") as f:
+            chunks = []
+            for start, end in ranges:
+                f.seek(start)
+                chunks.append(f.read(end - start).decode("utf-8"))
+        return chunks
+
+    def test_ranges_cover_the_rows_at_line_starts(self):
+        rows = "".join(f"DF{i:04d},{i},\n" for i in range(1000))
+        path = self.write_csv(self.HEADER + rows)
+        fieldnames, ranges = _byte_ranges(path, 7)
+        self.assertEqual(fieldnames, ["code", "type_id", "year"])
+        self.assertGreater(len(ranges), 1)
+        self.assertLessEqual(len(ranges), 7)
+        chunks = self.read(path, ranges)
+        self.assertEqual("".join(chunks), rows)
+        self.assertTrue(all(chunk.endswith("\n") for chunk in chunks))
+
+    def test_more_parts_than_rows(self):
+        rows = "DF0001,1,2004\nDF0002,2,\n"
+        path = self.write_csv(self.HEADER + rows)
+        _, ranges = _byte_ranges(path, 16)
+        self.assertEqual(self.read(path, ranges), ["DF0001,1,2004\n", "DF0002,2,\n"])
+
+    def test_last_row_without_newline(self):
+        path = self.write_csv(self.HEADER + "DF0001,1,2004\nDF0002,2,")
+        _, ranges = _byte_ranges(path, 1)
+        self.assertEqual(self.read(path, ranges), ["DF0001,1,2004\nDF0002,2,"])
+
+    def test_header_only(self):
+        path = self.write_csv(self.HEADER)
+        self.assertEqual(_byte_ranges(path, 4), (["code", "type_id", "year"], []))
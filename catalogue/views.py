@@ -1,3 +1,291 @@
-from django.shortcuts import render
+# catalogue/views.py
+from django.contrib.contenttypes.models import ContentType
+from django.views.decorators.http import condition
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
 
-# Create your views here.
+from vehicles.choices import VehicleCategory
+from .choices import ReferenceKind
+from .cross_reference import search_pads
+from .models import ProductIndex
+from .dimensions import DIMENSION_FIELDS, find_by_dimensions, parse_range, resolve_field
+from .cache import get_fitment, fitment_version
+from .fleet import fleet_products, parse_fleet
+from .fitment import PRODUCT_SECTIONS, find_vehicle, fitment_year, vehicle_title
+from .product_index import find_products, match_kind, search_products
+from .reverse_fitment import InvalidCursor, vehicles_for_product
+from .serializers import ProductSerializer, serialize_fitment
+
+
+def _catalogue_vehicle(request):
+    """
+    Resolve (and memoize on the request) the vehicle named by the query string:
+    ?vehicle=c|t&brand=&model=&type=  or  ?vehicle=b&brand=&model=&displacement=[&year=]
+    """
+    if not hasattr(request, '_catalogue_vehicle'):
+        params = request.GET
+        code = VehicleCategory.parse(params.get('vehicle'))
+        request._catalogue_vehicle = find_vehicle(
+            code, params.get('brand'), params.get('model'),
+            type_id=params.get('type'), displacement=params.get('displacement'), year=params.get('year'),
+        ) if code else None
+    return request._catalogue_vehicle
+
+
+def _catalogue_etag(request, *args, **kwargs):
+    vehicle = _catalogue_vehicle(request)
+    if vehicle is None:
+        return None
+    vehicle_ct = ContentType.objects.get_for_model(vehicle, for_concrete_model=False)
+    # strong ETag: the payload is a pure function of the vehicle and its fitment version
+    version = fitment_version(vehicle_ct, vehicle.pk, fitment_year(vehicle, request.GET.get('year')))
+    return f"catalogue-v2-{vehicle_ct.pk}.{vehicle.pk}-{version}"
+
+
+@condition(etag_func=_catalogue_etag)
+@api_view(['GET'])
+def get_catalogue(request):
+    vehicle = _catalogue_vehicle(request)
+    if vehicle is None:
+        return Response({"error": "Invalid or missing vehicle, brand, model, type or displacement."}, status=404)
+
+    vehicle_ct = ContentType.objects.get_for_model(vehicle, for_concrete_model=False)
+    return Response({
+        'vehicle': {
+            'type': vehicle.TYPE_CODE,
+            'id': vehicle.pk,
+            'brand': vehicle.brand.name,
+            'model': vehicle.model.name,
+            'name': vehicle_title(vehicle, request.GET.get('year')),
+        },
+        'products': serialize_fitment(get_fitment(vehicle_ct, vehicle.pk, fitment_year(vehicle, request.GET.get('year')))),
+    })
+
+
+@api_view(['GET'])
+def lookup_product(request):
+    """
+    ?q=<code, code without separators, or EAN>  ->  every product it names, best match first.
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return Response({"error": "Missing q."}, status=400)
+
+    titles = {model: title for title, model in PRODUCT_SECTIONS}
+    results = []
+    for entry in find_products(query):
+        model = ContentType.objects.get_for_id(entry.product_ct_id).model_class()
+        results.append({
+            'type': model._meta.model_name,
+            'title': titles.get(model, model._meta.verbose_name),
+            'code': entry.code,
+            'ean': entry.ean,
+            'match': match_kind(entry, query),
+        })
+    return Response(results)
+
+
+@api_view(['GET'])
+def cross_reference(request):
+    """
+    ?q=<FMSI and/or WVA numbers>[&kind=fmsi|wva]  ->  pads sharing any of them,
+    most shared references first.
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return Response({"error": "Missing q."}, status=400)
+    kind = request.GET.get('kind')
+    if kind:
+        kind = next((k.value for k in ReferenceKind if kind.lower() in (k.value.lower(), k.label.lower())), None)
+        if kind is None:
+            return Response({"error": "kind must be 'fmsi' or 'wva'."}, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response({"error": "limit must be an integer."}, status=400)
+
+    results = []
+    for pad, matched in search_pads(query, kind=kind, limit=limit):
+        row = ProductSerializer(pad).data
+        row.update(fmsi=pad.fmsi, wva_number=pad.wva_number, overlap=len(matched), matched=matched)
+        results.append(row)
+    return Response(results)
+
+
+@api_view(['GET'])
+def find_by_dimension(request):
+    """
+    ?type=disc&diameter=280~1&holes=5&thickness=22-26[&limit=&offset=]
+    Each dimension is an exact value, value~tolerance (or value±tolerance) or low-high.
+    """
+    product_type = (request.GET.get('type') or '').lower()
+    if product_type not in DIMENSION_FIELDS:
+        return Response({"error": f"type must be one of: {', '.join(DIMENSION_FIELDS)}."}, status=400)
+
+    ranges = {}
+    for name, value in request.GET.items():
+        if name in ('type', 'limit', 'offset'):
+            continue
+        field = resolve_field(product_type, name)
+        if field is None:
+            return Response({"error": f"Unknown dimension '{name}' for {product_type}."}, status=400)
+        try:
+            ranges[field] = parse_range(value)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+    if not ranges:
+        return Response({"error": "Give at least one dimension."}, status=400)
+
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        return Response({"error": "limit and offset must be integers."}, status=400)
+
+    products, has_more = find_by_dimensions(product_type, ranges, limit=limit, offset=offset)
+    fields = DIMENSION_FIELDS[product_type][1]
+    results = []
+    for product in products:
+        row = ProductSerializer(product).data
+        row['dimensions'] = {field: getattr(product, field) for field in fields}
+        results.append(row)
+    return Response({'results': results, 'has_more': has_more})
+
+
+@api_view(['GET'])
+def search_catalogue(request):
+    """
+    ?q=ate d76[&page=1&page_size=20]  ->  products matching every word (the last as a prefix)
+    in code, EAN, type label, braking system, threading or FMSI, best match first.
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return Response({"error": "Missing q."}, status=400)
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
+    except ValueError:
+        return Response({"error": "page and page_size must be integers."}, status=400)
+
+    entries, has_more = search_products(query, limit=page_size, offset=(page - 1) * page_size)
+
+    # one query per product type on the page
+    codes_by_ct = {}
+    for entry in entries:
+        codes_by_ct.setdefault(entry.product_ct_id, []).append(entry.code)
+    products = {}
+    for ct_id, codes in codes_by_ct.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        products.update({(ct_id, code): obj for code, obj in model.objects.in_bulk(codes).items()})
+
+    titles = {model: title for title, model in PRODUCT_SECTIONS}
+    results = []
+    for entry in entries:
+        product = products.get((entry.product_ct_id, entry.code))
+        if product is None:
+            continue
+        row = ProductSerializer(product).data
+        row.update(type=product._meta.model_name, title=titles.get(type(product), product._meta.verbose_name),
+                   rank=entry.rank)
+        results.append(row)
+    return Response({'page': page, 'page_size': page_size, 'has_more': has_more, 'results': results})
+
+
+@api_view(['GET'])
+def get_product_vehicles(request, code):
+    """
+    Vehicles one product fits, grouped by brand and model, ?limit= rows per page (max 500).
+    Follow 'next' (?cursor=) for the following page. ?type=disc picks the product table
+    when the same code exists in more than one.
+    """
+    entries = ProductIndex.objects.filter(code=code).select_related('product_ct')
+    product_type = request.GET.get('type')
+    if product_type:
+        entries = entries.filter(product_ct__model=product_type.lower())
+    entries = list(entries)
+    if not entries:
+        return Response({"error": "Unknown product."}, status=404)
+    if len(entries) > 1:
+        return Response({"error": "Code exists for several product types; pass ?type=.",
+                         "types": sorted(e.product_ct.model for e in entries)}, status=400)
+    entry = entries[0]
+
+    try:
+        limit = min(max(int(request.GET.get('limit', 100)), 1), 500)
+    except ValueError:
+        return Response({"error": "limit must be an integer."}, status=400)
+    try:
+        groups, next_cursor = vehicles_for_product(entry.product_ct_id, entry.code,
+                                                   cursor=request.GET.get('cursor'), limit=limit)
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=400)
+
+    return Response({
+        'product': {'type': entry.product_ct.model, 'code': entry.code},
+        'groups': groups,
+        'next': next_cursor,
+    })
+
+
+MAX_FLEET_VEHICLES = 1000
+
+
+@api_view(['GET', 'POST'])
+def fleet_parts(request):
+    """
+    Available parts for a fleet: ?vehicles=c:100,c:101,t:200,b:300:2004[&match=all|any][&type=pad][&limit=&offset=]
+    or the same keys as a JSON body (vehicles as a list); motorbikes may carry a model
+    year, without one their year-limited parts are left out. match=all (default) returns
+    parts fitting every vehicle, match=any the union, most widely fitting first.
+    """
+    params = request.data if request.method == 'POST' else request.GET
+    vehicles = params.get('vehicles') or []
+    if isinstance(vehicles, str):
+        vehicles = [v for v in vehicles.split(',') if v.strip()]
+    vehicles, invalid = parse_fleet(vehicles)
+    if invalid:
+        return Response({"error": "Vehicles must be given as <type>:<id>[:<year> for motorbikes], e.g. c:100 or b:300:2004.", "invalid": invalid}, status=400)
+    if not vehicles:
+        return Response({"error": "Missing vehicles."}, status=400)
+    if len(vehicles) > MAX_FLEET_VEHICLES:
+        return Response({"error": f"At most {MAX_FLEET_VEHICLES} vehicles."}, status=400)
+
+    match = (params.get('match') or 'all').lower()
+    if match not in ('all', 'any'):
+        return Response({"error": "match must be 'all' or 'any'."}, status=400)
+    product_model = None
+    product_type = (params.get('type') or '').lower()
+    if product_type:
+        product_model = next((model for _, model in PRODUCT_SECTIONS if model._meta.model_name == product_type), None)
+        if product_model is None:
+            return Response({"error": f"Unknown product type '{product_type}'."}, status=400)
+    try:
+        limit = min(max(int(params.get('limit', 100)), 1), 500)
+        offset = max(int(params.get('offset', 0)), 0)
+    except (TypeError, ValueError):
+        return Response({"error": "limit and offset must be integers."}, status=400)
+
+    rows = fleet_products(vehicles, match_all=match == 'all', product_model=product_model)
+    page = rows[offset:offset + limit]
+
+    # one query per product type on the page
+    codes_by_ct = {}
+    for ct_id, code, _ in page:
+        codes_by_ct.setdefault(ct_id, []).append(code)
+    products = {}
+    for ct_id, codes in codes_by_ct.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        products.update({(ct_id, code): obj for code, obj in model.objects.in_bulk(codes).items()})
+
+    titles = {model: title for title, model in PRODUCT_SECTIONS}
+    results = []
+    for ct_id, code, fits in page:
+        product = products.get((ct_id, code))
+        if product is None:
+            continue
+        row = ProductSerializer(product).data
+        row.update(type=product._meta.model_name, title=titles.get(type(product), product._meta.verbose_name),
+                   fits=fits)
+        results.append(row)
+    return Response({'match': match, 'vehicles': len(vehicles), 'count': len(rows),
+                     'has_more': offset + limit < len(rows), 'results': results})
@@ -0,0 +1,90 @@
+# main/management/commands/benchmark_catalogue.py
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+
+from catalogue.fitment import resolve_fitment, aresolve_fitment
+from catalogue.models import ProductVehicle
+
+
+# FOR RUNNING USE:
+# python manage.py benchmark_catalogue
+#
+# Emulate a remote Postgres (adds 5 ms to every query) and compare concurrency limits:
+# python manage.py benchmark_catalogue --simulate-rtt 5 --concurrency 8
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the sync fitment resolver (catalogue view) against the async, concurrent one "
+        "(catalogue_async view) on the vehicles with the most fitments. Bypasses the cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vehicles", type=int, default=20, help="How many vehicles to sample (default: 20).")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per vehicle and path (default: 5).")
+        parser.add_argument("--concurrency", type=int, default=4, help="Async concurrency limit (default: 4).")
+        parser.add_argument(
+            "--simulate-rtt",
+            type=float,
+            default=0.0,
+            help="Extra milliseconds of latency added to every query, to emulate a remote database.",
+        )
+
+    def handle(self, *args, **opts):
+        vehicles = list(
+            ProductVehicle.objects.values_list("vehicle_ct_id", "vehicle_id")
+            .annotate(n=Count("id")).order_by("-n")[: opts["vehicles"]]
+        )
+        if not vehicles:
+            raise CommandError("No ProductVehicle rows to benchmark against.")
+
+        rtt = opts["simulate_rtt"] / 1000
+        if rtt:
+            def delay(execute, sql, params, many, context):
+                time.sleep(rtt)
+                return execute(sql, params, many, context)
+
+            def add_delay(sender, connection, **kwargs):
+                # fires again on every reconnect of the same wrapper
+                if delay not in connection.execute_wrappers:
+                    connection.execute_wrappers.append(delay)
+
+            connection.ensure_connection()
+            connection.execute_wrappers.append(delay)
+            # worker threads open their own connections; hook those as they are created
+            connection_created.connect(add_delay, weak=False)
+
+        # one long-lived loop, like an ASGI server: its worker threads (and their connections) are reused
+        loop = asyncio.new_event_loop()
+        sync_times, async_times = [], []
+        try:
+            for ct_id, vehicle_id, _ in vehicles:
+                for _ in range(opts["repeat"]):
+                    start = time.perf_counter()
+                    resolve_fitment(ct_id, vehicle_id)
+                    sync_times.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    loop.run_until_complete(aresolve_fitment(ct_id, vehicle_id, concurrency=opts["concurrency"]))
+                    async_times.append(time.perf_counter() - start)
+        finally:
+            loop.close()
+
+        self.stdout.write(f"Vehicles: {len(vehicles)}  runs per path: {len(sync_times)}  simulated RTT: {opts['simulate_rtt']} ms")
+        for label, samples in (("sync ", sync_times), ("async", async_times)):
+            self.stdout.write(
+                f"  {label}  mean {statistics.mean(samples) * 1000:8.2f} ms"
+                f"  p50 {_percentile(samples, 50) * 1000:8.2f} ms"
+                f"  p95 {_percentile(samples, 95) * 1000:8.2f} ms"
+            )
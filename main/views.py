@@ -2,12 +2,21 @@ from datetime import date
 from lib2to3.fixes.fix_input import context
 
 from django.contrib.contenttypes.models import ContentType
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render
+from django.template.loader import get_template, render_to_string
 
 from catalogue.admin import DiscAdmin
-from catalogue.models import Disc, Drum, Pad, PadAccessory, Hose, WheelCylinder, MasterCylinder, ClutchCylinder, \
-    ClutchMasterCylinder, Caliper, ShoeKit, Shoe, ProportioningValve, Kit
+from catalogue.cache import get_fitment, aget_fitment, get_facets
+from catalogue.facets import FACETS, facet_options, filter_products, parse_filters
+from catalogue.fitment import find_vehicle, fitment_year, vehicle_title, iter_fitment
 from vehicles.choices import VehicleCategory
+from vehicles.directory import get_directory
 from vehicles.serializers import *
 
 
@@ -16,10 +25,8 @@ from vehicles.serializers import *
 
 def home(request):
     vehicle_type = 'c'
-    brands = Brand.objects.filter(vehicle_type=vehicle_type).order_by('name')
-
-    serializer = BrandSerializer(brands, many=True)
-    context = {'brands': serializer.data}
+    directory = get_directory()
+    context = {'brands': directory.brands_for(vehicle_type), 'tree_version': directory.version}
 
     return render(request, 'index.html', context)
 
@@ -32,62 +39,93 @@ def catalogue(request):
     disp_id = request.GET.get('displacement')
     year = request.GET.get('year')
 
-    if vehicle_type == VehicleCategory.BIKE:
-        vehicle = MotorBike.objects.filter(brand_id=brand_id, model_id=model_id, displacement=disp_id).first()
-        vehicle_name = f"{vehicle.displacement}cc {year}"
-    elif vehicle_type == VehicleCategory.CAR:
-        vehicle = Car.objects.filter(brand_id=brand_id, model_id=model_id, pk=type_id).first()
-        start = vehicle.date_start.strftime('%m/%y') if vehicle.date_start else '?'
-        end = vehicle.date_end.strftime('%m/%y') if vehicle.date_end else 'Now'
-        vehicle_name = f"{vehicle.name} {start} - {end}"
-    else:
-        vehicle = CommercialVehicle.objects.filter(brand_id=brand_id, model_id=model_id, pk=type_id).first()
-        start = vehicle.date_start.strftime('%m/%y') if vehicle.date_start else '?'
-        end = vehicle.date_end.strftime('%m/%y') if vehicle.date_end else 'Now'
-        vehicle_name = f"{vehicle.name} {start} - {end}"
+    vehicle = find_vehicle(vehicle_type, brand_id, model_id, type_id=type_id, displacement=disp_id, year=year)
+    if vehicle is None:
+        raise Http404("Vehicle not found.")
+    vehicle_name = vehicle_title(vehicle, year)
+    year = fitment_year(vehicle, year)
 
     brand_name = vehicle.brand.name
     model_name = vehicle.model.name
 
-
     vehicle_ct = ContentType.objects.get_for_model(vehicle, for_concrete_model=False)
-    discs = Disc.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    drums = Drum.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    pads = Pad.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    pad_accessories = PadAccessory.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    hoses = Hose.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    wheel_cylinders = WheelCylinder.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    master_cylinders = MasterCylinder.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    clutch_cylinders = ClutchCylinder.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    clutch_master_cylinders = ClutchMasterCylinder.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    calipers = Caliper.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    shoe_kits = ShoeKit.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    shoes = Shoe.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    proportioning_valves = ProportioningValve.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-    kits = Kit.objects.filter(product_links__vehicle_ct=vehicle_ct, product_links__vehicle_id=vehicle.pk, available=True).distinct()
-
-    products = [
-        ("Brake Discs", discs),
-        ("Brake Drum", drums),
-        ("Brake Pad", pads),
-        ("Pad Accessory", pad_accessories),
-        ("Hose", hoses),
-        ("Wheel Cylinder", wheel_cylinders),
-        ("Master Cylinder", master_cylinders),
-        ("Clutch Cylinder", clutch_cylinders),
-        ("Clutch Master Cylinder", clutch_master_cylinders),
-        ("Caliper", calipers),
-        ("Shoe Kit", shoe_kits),
-        ("Shoe", shoes),
-        ("Proportioning Valve", proportioning_valves),
-        ("Kits", kits),
-    ]
+
+    # facet counts and filtering both work off the cached payload, never the product tables
+    selected = parse_filters(request.GET)
+    base_query = request.GET.copy()
+    for name in FACETS:
+        base_query.pop(name, None)
 
     context = {
         'brand': brand_name,
         'model': model_name,
         'vehicle': vehicle_name,
-        'products': products,
+        'facets': facet_options(get_facets(vehicle_ct, vehicle.pk, year), selected),
+        'filtered': bool(selected),
+        'base_query': base_query,
     }
 
+    stream = request.GET.get('stream')
+    if not selected and (stream == '1' or (stream is None and settings.CATALOGUE_STREAMING)):
+        response = StreamingHttpResponse(_stream_catalogue(request, context, vehicle_ct, vehicle.pk, year))
+        response['X-Accel-Buffering'] = 'no'  # let nginx pass chunks straight through
+        return response
+
+    context['products'] = filter_products(get_fitment(vehicle_ct, vehicle.pk, year), selected)
+    context['no_matches'] = bool(selected) and not any(items for _, items in context['products'])
     return render(request, 'catalogue.html', context=context)
+
+
+async def catalogue_async(request):
+    """
+    catalogue() for ASGI: same query string and template, but the per-type product
+    reads run concurrently (see catalogue.fitment.aresolve_fitment).
+    """
+    vehicle_type = VehicleCategory.parse(request.GET.get('vehicle'))
+    year = request.GET.get('year')
+    vehicle = await sync_to_async(find_vehicle)(
+        vehicle_type, request.GET.get('brand'), request.GET.get('model'),
+        type_id=request.GET.get('type'), displacement=request.GET.get('displacement'), year=year,
+    )
+    if vehicle is None:
+        raise Http404("Vehicle not found.")
+
+    vehicle_ct = await sync_to_async(ContentType.objects.get_for_model)(vehicle, for_concrete_model=False)
+
+    context = {
+        'brand': vehicle.brand.name,
+        'model': vehicle.model.name,
+        'vehicle': vehicle_title(vehicle, year),
+        'products': await aget_fitment(vehicle_ct, vehicle.pk, fitment_year(vehicle, year)),
+    }
+
+    return await sync_to_async(render)(request, 'catalogue.html', context=context)
+
+
+SECTIONS_MARKER = '<!--catalogue-sections-->'
+CARDS_MARKER = '<!--catalogue-cards-->'
+
+
+def _stream_catalogue(request, context, vehicle_ct, vehicle_id, year=None):
+    """
+    Yield catalogue.html piecewise: the page shell (header + vehicle title) first,
+    then every product section as its query is read, cards flushed per chunk.
+    """
+    chunk_size = settings.CATALOGUE_STREAM_CHUNK_SIZE
+    shell = render_to_string('catalogue.html', {**context, 'streaming': True, 'sections_marker': SECTIONS_MARKER}, request)
+    head, tail = shell.split(SECTIONS_MARKER)
+    yield head
+
+    card = get_template('product_card.html')
+    for title, items in iter_fitment(vehicle_ct, vehicle_id, chunk_size=chunk_size, year=year):
+        section_open = section_close = None
+        while chunk := list(islice(items, chunk_size)):
+            if section_open is None:
+                section = render_to_string('catalogue_section.html', {'title': title, 'streaming': True, 'cards_marker': CARDS_MARKER})
+                section_open, section_close = section.split(CARDS_MARKER)
+                yield section_open
+            yield ''.join(card.render({'item': item}) for item in chunk)
+        if section_close is not None:
+            yield section_close
+
+    yield tail
@@ -176,6 +176,6 @@ class MotorBikeAdmin(admin.ModelAdmin):
     inlines = [CompatibleProductInline]
 
     def years_list(self, obj):
-        return ", ".join(str(y.value) for y in obj.years.all())
+        return ", ".join(str(y) for y in obj.model_years())
 
     years_list.short_description = 'Model Years'
\ No newline at end of file
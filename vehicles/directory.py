@@ -0,0 +1,293 @@
+# vehicles/directory.py
+"""
+In-process copy of the vehicle tables behind the selector APIs.
+
+The data only changes when vehicles are imported or edited, so it is dumped to a
+JSON snapshot file (compact row arrays) after every change. Each worker loads that
+file once and answers get_brands/get_models/get_types/get_motorbikes from dicts,
+re-reading it when the file changes.
+
+The file is JSON parsed once per worker and version rather than a shared mmap: the
+lookups need dicts and prebuilt response lists, which a mapped binary layout would
+have to decode again on every request. Only the parse is repeated per worker.
+
+The snapshot and the selector trees (vehicles/tree.py, brotli at quality 11) are
+written after commit in a background thread, never inside the request that changed
+a vehicle; import_vehicle_data writes them itself with flush_snapshot() before exiting.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .choices import VehicleCategory
+from .models import Brand, Model, Car, CommercialVehicle, MotorBike, unpack_years
+from .serializers import month_year
+from .tree import write_trees
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_date(value):
+    return datetime.date.fromisoformat(value) if value else None
+
+
+class BrandRecord:
+    __slots__ = ('id', 'name', 'vehicle_type')
+
+    def __init__(self, id, name, vehicle_type):
+        self.id, self.name, self.vehicle_type = id, name, vehicle_type
+
+    def as_dict(self):
+        return {'id': self.id, 'name': self.name}
+
+
+class ModelRecord:
+    __slots__ = ('id', 'brand_id', 'name', 'date_start', 'date_end')
+
+    def __init__(self, id, brand_id, name, date_start, date_end):
+        self.id, self.brand_id, self.name = id, brand_id, name
+        self.date_start, self.date_end = _parse_date(date_start), _parse_date(date_end)
+
+    def as_dict(self):
+        return {'id': self.id, 'name': self.name,
+                'date_start': month_year(self.date_start, '?'), 'date_end': month_year(self.date_end, 'now')}
+
+
+class TypeRecord:
+    """A Car or CommercialVehicle row."""
+    __slots__ = ('id', 'brand_id', 'model_id', 'name', 'kw', 'cv', 'date_start', 'date_end')
+
+    def __init__(self, id, brand_id, model_id, name, kw, cv, date_start, date_end):
+        self.id, self.brand_id, self.model_id, self.name = id, brand_id, model_id, name
+        self.kw, self.cv = kw, cv
+        self.date_start, self.date_end = _parse_date(date_start), _parse_date(date_end)
+
+    def as_dict(self):
+        return {'id': self.id, 'name': self.name, 'kw': self.kw, 'cv': self.cv,
+                'date_start': month_year(self.date_start, '?'), 'date_end': month_year(self.date_end, 'now')}
+
+
+class BikeRecord:
+    __slots__ = ('id', 'brand_id', 'model_id', 'displacement', 'years')
+
+    def __init__(self, id, brand_id, model_id, displacement, years):
+        self.id, self.brand_id, self.model_id = id, brand_id, model_id
+        self.displacement, self.years = displacement, tuple(years)
+
+    def as_dict(self):
+        return {'id': self.id, 'brand': self.brand_id, 'model': self.model_id,
+                'displacement': self.displacement, 'years': list(self.years)}
+
+
+class VehicleDirectory:
+    """
+    Vehicle records indexed by brand id and model id, with the API responses prebuilt.
+    """
+
+    def __init__(self, snapshot: dict):
+        self.version = snapshot['version']
+        self.generated_at = datetime.datetime.fromisoformat(snapshot['generated_at'])
+
+        self.brands = {row[0]: BrandRecord(*row) for row in snapshot['brands']}
+        self.models = {row[0]: ModelRecord(*row) for row in snapshot['models']}
+        self.cars = {row[0]: TypeRecord(*row) for row in snapshot['cars']}
+        self.cvs = {row[0]: TypeRecord(*row) for row in snapshot['cvs']}
+        self.bikes = {row[0]: BikeRecord(*row) for row in snapshot['bikes']}
+
+        by_name = lambda r: (r.name, r.id)
+
+        brands_by_type = defaultdict(list)
+        for b in sorted(self.brands.values(), key=by_name):
+            brands_by_type[b.vehicle_type].append(b)
+        models_by_brand = defaultdict(list)
+        for m in sorted(self.models.values(), key=by_name):
+            models_by_brand[m.brand_id].append(m)
+        types_by_model = {VehicleCategory.CAR: defaultdict(list), VehicleCategory.CV: defaultdict(list)}
+        for code, rows in ((VehicleCategory.CAR, self.cars), (VehicleCategory.CV, self.cvs)):
+            for t in sorted(rows.values(), key=by_name):
+                types_by_model[code][(t.brand_id, t.model_id)].append(t)
+        bikes_by_model = defaultdict(list)
+        for mb in sorted(self.bikes.values(), key=lambda r: (r.displacement, r.id)):
+            bikes_by_model[(mb.brand_id, mb.model_id)].append(mb)
+
+        self.brands_by_type = dict(brands_by_type)
+        self.models_by_brand = dict(models_by_brand)
+        self.types_by_model = {code: dict(index) for code, index in types_by_model.items()}
+        self.bikes_by_model = dict(bikes_by_model)
+
+        # API payloads, built once per load
+        self._brand_rows = {code: [b.as_dict() for b in rows] for code, rows in self.brands_by_type.items()}
+        self._model_rows = {brand_id: [m.as_dict() for m in rows] for brand_id, rows in self.models_by_brand.items()}
+        self._type_rows = {code: {key: [t.as_dict() for t in rows] for key, rows in index.items()}
+                           for code, index in self.types_by_model.items()}
+        self._bike_rows = {key: [mb.as_dict() for mb in rows] for key, rows in self.bikes_by_model.items()}
+
+    def brands_for(self, code) -> list[dict]:
+        return self._brand_rows.get(code, [])
+
+    def models_for(self, code, brand_id: int) -> list[dict]:
+        brand = self.brands.get(brand_id)
+        if brand is None or brand.vehicle_type != code:
+            return []
+        return self._model_rows.get(brand_id, [])
+
+    def types_for(self, code, brand_id: int, model_id: int) -> list[dict]:
+        brand = self.brands.get(brand_id)
+        if brand is None or brand.vehicle_type != code or code not in self._type_rows:
+            return []
+        return self._type_rows[code].get((brand_id, model_id), [])
+
+    def motorbikes_for(self, brand_id: int, model_id: int) -> list[dict]:
+        return self._bike_rows.get((brand_id, model_id), [])
+
+
+# ---------- snapshot file ----------
+
+def snapshot_path() -> Path:
+    return Path(settings.VEHICLE_SNAPSHOT_PATH)
+
+
+def build_snapshot() -> dict:
+    """
+    Read every vehicle table once (five queries) into the snapshot layout.
+    """
+    def iso(d):
+        return d.isoformat() if d else None
+
+    types = lambda model: [
+        [pk, brand_id, model_id, name, kw, cv, iso(start), iso(end)]
+        for pk, brand_id, model_id, name, kw, cv, start, end in model.objects.order_by('pk').values_list(
+            'pk', 'brand_id', 'model_id', 'name', 'kw', 'cv', 'date_start', 'date_end')
+    ]
+    data = {
+        'brands': [list(row) for row in Brand.objects.order_by('pk').values_list('pk', 'name', 'vehicle_type')],
+        'models': [[pk, brand_id, name, iso(start), iso(end)]
+                   for pk, brand_id, name, start, end in Model.objects.order_by('pk').values_list(
+                       'pk', 'brand_id', 'name', 'date_start', 'date_end')],
+        'cars': types(Car),
+        'cvs': types(CommercialVehicle),
+        'bikes': [[pk, brand_id, model_id, displacement, unpack_years(year_from, year_mask)]
+                  for pk, brand_id, model_id, displacement, year_from, year_mask in MotorBike.objects.order_by('pk')
+                  .values_list('pk', 'brand_id', 'model_id', 'displacement', 'year_from', 'year_mask')],
+    }
+    data['version'] = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+    data['generated_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    return data
+
+
+_changes = 0   # committed vehicle changes in this process
+_written = 0   # value of _changes when the last snapshot was read from the DB
+_write_lock = threading.RLock()   # one snapshot write at a time
+_schedule_lock = threading.Lock()
+_writing = False
+
+
+def write_snapshot() -> str:
+    """
+    Dump the vehicle tables to the snapshot file (atomically) and return its version.
+    """
+    global _written, _directory
+    with _write_lock:
+        _written = _changes
+        data = build_snapshot()
+        path = snapshot_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, separators=(',', ':')), encoding='utf-8')
+        os.replace(tmp, path)
+        _directory = None  # reload on next access
+        write_trees(VehicleDirectory(data))
+    return data['version']
+
+
+def flush_snapshot() -> None:
+    """
+    Write the snapshot now if this process changed vehicles since the last write,
+    waiting for a background write in progress. For commands, whose background
+    thread would not outlive them.
+    """
+    with _write_lock:
+        if _written < _changes:
+            write_snapshot()
+
+
+def _write_in_background():
+    global _writing
+    try:
+        while True:
+            with _schedule_lock:
+                if _written >= _changes:
+                    _writing = False
+                    return
+            write_snapshot()
+    except Exception:
+        logger.exception("Writing the vehicle snapshot %s failed.", snapshot_path())
+        with _schedule_lock:
+            _writing = False
+    finally:
+        connection.close()
+
+
+def _changed():
+    global _changes, _writing
+    with _schedule_lock:
+        _changes += 1
+        start, _writing = not _writing, True
+    if start:
+        threading.Thread(target=_write_in_background, name="vehicle-snapshot", daemon=True).start()
+
+
+def schedule_snapshot(**kwargs):
+    """
+    Signal handler: rewrite the snapshot in a background thread once the surrounding
+    transaction commits. Changes committed while a write runs are caught up by one
+    more write, so an import saving thousands of rows still writes it once or twice.
+    """
+    transaction.on_commit(_changed)
+
+
+# ---------- per-process directory ----------
+
+_directory: VehicleDirectory | None = None
+_directory_mtime = None
+_checked_at = 0.0
+
+
+def get_directory() -> VehicleDirectory:
+    """
+    The current VehicleDirectory. The snapshot file is stat()ed at most once every
+    VEHICLE_DIRECTORY_CHECK_INTERVAL seconds and reloaded when it changed; without a
+    snapshot file the directory is built from the database and the file written in
+    the background.
+    """
+    global _directory, _directory_mtime, _checked_at
+    now = time.monotonic()
+    if _directory is not None and now - _checked_at < settings.VEHICLE_DIRECTORY_CHECK_INTERVAL:
+        return _directory
+    _checked_at = now
+
+    path = snapshot_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    if mtime is None:
+        if _directory is None:
+            _directory = VehicleDirectory(build_snapshot())
+            _changed()
+        return _directory
+
+    if _directory is None or mtime != _directory_mtime:
+        _directory = VehicleDirectory(json.loads(path.read_text(encoding='utf-8')))
+        _directory_mtime = mtime
+    return _directory
@@ -0,0 +1,96 @@
+# vehicles/management/commands/benchmark_vehicle_serializers.py
+import datetime
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from vehicles.choices import VehicleCategory
+from vehicles.models import Brand, Model, Car
+from vehicles.directory import VehicleDirectory, build_snapshot
+from vehicles.serializers import VehicleModelSerializer, CarSerializer
+
+
+# FOR RUNNING USE:
+# python manage.py benchmark_vehicle_serializers
+#
+# Bigger lists, more runs:
+# python manage.py benchmark_vehicle_serializers --rows 50000 --repeat 10
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the DRF ModelSerializers against the vehicle directory (values() rows with "
+        "prebuilt payloads) on generated model and car lists. The rows are created in a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000, help="Rows per list (default: 10000).")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per path (default: 5).")
+
+    def handle(self, *args, **opts):
+        rows = opts["rows"]
+        if rows < 1:
+            raise CommandError("--rows must be positive.")
+
+        try:
+            with transaction.atomic():
+                self._run(rows, opts["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, rows, repeat):
+        start_date = datetime.date(1990, 1, 1)
+        # every third row has open dates, to exercise the "?"/"now" fallbacks
+        date = lambda i, days: None if i % 3 == 0 else start_date + datetime.timedelta(days=days + i % 9000)
+
+        brand = Brand.objects.create(name="BENCHMARK", vehicle_type=VehicleCategory.CAR)
+        Model.objects.bulk_create(
+            [Model(brand=brand, name=f"MODEL {i}", date_start=date(i, 0), date_end=date(i, 3000))
+             for i in range(rows)],
+            batch_size=2000,
+        )
+        model = Model.objects.filter(brand=brand).first()
+        Car.objects.bulk_create(
+            [Car(brand=brand, model=model, name=f"TYPE {i}", kw=50 + i % 200, cv=68 + i % 272,
+                 date_start=date(i, 0), date_end=date(i, 3000))
+             for i in range(rows)],
+            batch_size=2000,
+        )
+
+        cases = (
+            ("models", Model.objects.filter(brand=brand).order_by("name", "id"), VehicleModelSerializer,
+             lambda directory: directory.models_for(VehicleCategory.CAR, brand.id)),
+            ("cars", Car.objects.filter(brand=brand, model=model).order_by("name", "id"), CarSerializer,
+             lambda directory: directory.types_for(VehicleCategory.CAR, brand.id, model.id)),
+        )
+        directory = VehicleDirectory(build_snapshot())
+        self.stdout.write(f"Rows per list: {rows}  runs per path: {repeat}")
+        for label, queryset, serializer, lookup in cases:
+            if serializer(queryset, many=True).data != lookup(directory):
+                raise CommandError(f"Directory rows differ from {serializer.__name__}.")
+
+            self._time(label, serializer.__name__, repeat, lambda: serializer(queryset.all(), many=True).data)
+            self._time(label, "directory lookup", repeat, lambda: lookup(directory))
+
+        # what every change to the vehicle tables costs instead: one read of all of them
+        self._time("all", "directory rebuild", repeat, lambda: VehicleDirectory(build_snapshot()))
+
+    def _time(self, label, name, repeat, func):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - started)
+        self.stdout.write(
+            f"  {label:<7} {name:<27}"
+            f"  mean {statistics.mean(samples) * 1000:8.2f} ms"
+            f"  min {min(samples) * 1000:8.2f} ms"
+        )
@@ -0,0 +1,12 @@
+# vehicles/management/commands/build_vehicle_snapshot.py
+from django.core.management.base import BaseCommand
+
+from vehicles.directory import write_snapshot, snapshot_path
+
+
+class Command(BaseCommand):
+    help = "Rewrite the vehicle directory snapshot that serves the selector APIs (VEHICLE_SNAPSHOT_PATH)."
+
+    def handle(self, *args, **options):
+        version = write_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {snapshot_path()} (version {version})"))
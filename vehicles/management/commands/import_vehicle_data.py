@@ -2,7 +2,7 @@
 
 import csv
 import datetime
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 from django.core.management.base import BaseCommand
 from django.db import transaction
@@ -15,6 +15,8 @@ from vehicles.models import (
     MotorBike,
     Year,
 )
+from vehicles.directory import flush_snapshot, get_directory
+from catalogue.progress import ImportProgress, count_lines
 
 # map the CSV’s full names to your one‐letter codes
 VEHICLE_TYPE_MAP = {
@@ -49,22 +51,51 @@ class Command(BaseCommand):
             '--dir', default='.',
             help='Directory where brand.csv, model.csv, type.csv, bikeDisplacement.csv, bikeYear.csv live',
         )
+        parser.add_argument(
+            '--summary-json', metavar='PATH',
+            help='Also write the import summary (counts, phase timings, peak memory) to PATH as JSON.',
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
         base = options['dir'].rstrip('/')
+        # one line per brand/model/type only with -v 2; progress lines are throttled
+        self.verbose = options['verbosity'] >= 2
+        self.counts = Counter()
         self.stdout.write("➡️  Starting import…")
 
-        self.import_brands(f"{base}/brand.csv")
-        self.import_models(f"{base}/model.csv")
-        self.import_types(f"{base}/type.csv")
-        self.import_bikes(
-            disp_path = f"{base}/bikeDisplacement.csv",
-            year_path = f"{base}/bikeYear.csv",
+        row_files = [f"{base}/{name}.csv" for name in ('brand', 'model', 'type', 'bikeDisplacement')]
+        self.progress = ImportProgress(
+            "vehicles", write=self.stdout.write,
+            total=sum(max(count_lines(path) - 1, 0) for path in row_files),
         )
+        with transaction.atomic():
+            with self.progress.phase("brands"):
+                self.import_brands(f"{base}/brand.csv")
+            with self.progress.phase("models"):
+                self.import_models(f"{base}/model.csv")
+            with self.progress.phase("types"):
+                self.import_types(f"{base}/type.csv")
+            with self.progress.phase("bikes"):
+                self.import_bikes(
+                    disp_path = f"{base}/bikeDisplacement.csv",
+                    year_path = f"{base}/bikeYear.csv",
+                )
 
+        # the vehicle signals only schedule a background write, which would not outlive the command
+        flush_snapshot()
+        self.stdout.write(f" • Vehicle directory snapshot version {get_directory().version}")
+        for key, n in sorted(self.counts.items()):
+            self.stdout.write(f"   {key}: {n}")
+        self.progress.finish(options['summary_json'], counters=self.counts)
         self.stdout.write(self.style.SUCCESS("✅  Done!"))
 
+    def report(self, kind, created, line):
+        """Count a created/updated row; print it with -v 2."""
+        self.counts[f"{kind} {'created' if created else 'updated'}"] += 1
+        self.progress.advance()
+        if self.verbose:
+            self.stdout.write(line)
+
     def import_brands(self, path):
         self.stdout.write(f" • Importing brands from {path}")
         with open(path, newline='', encoding='utf-8') as f:
@@ -78,7 +109,7 @@ class Command(BaseCommand):
                     }
                 )
                 verb = "Created" if created else "Updated"
-                self.stdout.write(f"   {verb} Brand {b.name!r} (id={bid})")
+                self.report("Brand", created, f"   {verb} Brand {b.name!r} (id={bid})")
 
     def import_models(self, path):
         self.stdout.write(f" • Importing models from {path}")
@@ -92,6 +123,7 @@ class Command(BaseCommand):
                     self.stderr.write(
                         f"⚠️  Skipping model {row['model_name']!r}: unknown brand_id {bid_csv}"
                     )
+                    self.progress.advance()
                     continue
 
                 m, created = CarModel.objects.update_or_create(
@@ -104,9 +136,7 @@ class Command(BaseCommand):
                     }
                 )
                 verb = "Created" if created else "Updated"
-                self.stdout.write(
-                    f"   {verb} Model {m.name!r} of Brand {brand.name!r} (id={mid})"
-                )
+                self.report("Model", created, f"   {verb} Model {m.name!r} of Brand {brand.name!r} (id={mid})")
 
     def import_types(self, path):
         self.stdout.write(f" • Importing cars & commercial vehicles from {path}")
@@ -118,6 +148,7 @@ class Command(BaseCommand):
                     model = CarModel.objects.get(id=mid)
                 except CarModel.DoesNotExist:
                     self.stderr.write(f"⚠️  Skipping type {row['type_name']!r}: unknown model_id {mid}")
+                    self.progress.advance()
                     continue
 
                 defaults = {
@@ -134,6 +165,7 @@ class Command(BaseCommand):
                     cls = CommercialVehicle
                 else:
                     # skip anything not Car/CommercialVehicle here
+                    self.progress.advance()
                     continue
 
                 obj, created = cls.objects.update_or_create(
@@ -144,7 +176,7 @@ class Command(BaseCommand):
                     }
                 )
                 verb = "Created" if created else "Updated"
-                self.stdout.write(f"   {verb} {cls.__name__} {obj.name!r} (id={tid})")
+                self.report(cls.__name__, created, f"   {verb} {cls.__name__} {obj.name!r} (id={tid})")
 
     def import_bikes(self, disp_path, year_path):
         # first build a map of disp_id → [year_value, …]
@@ -164,6 +196,7 @@ class Command(BaseCommand):
                     model = CarModel.objects.get(id=mid)
                 except CarModel.DoesNotExist:
                     self.stderr.write(f"⚠️  Skipping bike disp_id={disp_id}: unknown model_id {mid}")
+                    self.progress.advance()
                     continue
 
                 mb, created = MotorBike.objects.update_or_create(
@@ -183,6 +216,4 @@ class Command(BaseCommand):
                 mb.years.set(year_objs)
 
                 verb = "Created" if created else "Updated"
-                self.stdout.write(
-                    f"   {verb} MotorBike {mb} (id={disp_id}, years={year_vals})"
-                )
\ No newline at end of file
+                self.report("MotorBike", created, f"   {verb} MotorBike {mb} (id={disp_id}, years={year_vals})")
\ No newline at end of file
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:04
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+YEAR_MASK_BITS = 63
+
+
+def pack_existing_years(apps, schema_editor):
+    MotorBike = apps.get_model('vehicles', 'MotorBike')
+    years = defaultdict(list)
+    for bike_id, value in MotorBike.years.through.objects.values_list('motorbike_id', 'year__value'):
+        years[bike_id].append(value)
+    bikes = []
+    for bike in MotorBike.objects.filter(pk__in=list(years)).only('pk'):
+        values = sorted(set(years[bike.pk]))
+        first = values[0]
+        values = [y for y in values if y - first < YEAR_MASK_BITS]
+        bike.year_from, bike.year_to = first, values[-1]
+        bike.year_mask = sum(1 << (y - first) for y in values)
+        bikes.append(bike)
+    MotorBike.objects.bulk_update(bikes, ['year_from', 'year_to', 'year_mask'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0005_alter_brand_vehicle_type_alter_car_brand'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motorbike',
+            name='year_from',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='motorbike',
+            name='year_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='motorbike',
+            name='year_to',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(pack_existing_years, migrations.RunPython.noop),
+    ]
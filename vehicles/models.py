@@ -1,6 +1,8 @@
 # vehicles/models.py
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.lookups import Exact
 from smart_selects.db_fields import ChainedForeignKey
 from .choices import VehicleCategory
 
@@ -86,6 +88,41 @@ class Year(models.Model):
         verbose_name_plural = 'Model Years'
     def __str__(self): return f"{self.value}"
 
+# MotorBike.year_mask is a signed BigIntegerField: bit i set = built in year_from + i
+YEAR_MASK_BITS = 63
+
+
+def pack_years(years) -> tuple[int | None, int | None, int]:
+    """
+    Model years -> (year_from, year_to, year_mask). Years more than YEAR_MASK_BITS - 1
+    after the first are dropped.
+    """
+    years = sorted(set(years))
+    if not years:
+        return None, None, 0
+    first = years[0]
+    years = [y for y in years if y - first < YEAR_MASK_BITS]
+    mask = 0
+    for y in years:
+        mask |= 1 << (y - first)
+    return first, years[-1], mask
+
+
+def unpack_years(year_from, year_mask) -> list[int]:
+    if year_from is None:
+        return []
+    return [year_from + i for i in range(year_mask.bit_length()) if year_mask >> i & 1]
+
+
+def built_in_q(year: int, prefix: str = '') -> Q:
+    """
+    MotorBike rows built in year (prefix for a related lookup, e.g. "motorbike__"):
+    the year_from/year_to range narrows the rows, the mask bit decides.
+    """
+    bit = F(f'{prefix}year_mask').bitrightshift(Value(year) - F(f'{prefix}year_from')).bitand(1)
+    return Q(**{f'{prefix}year_from__lte': year, f'{prefix}year_to__gte': year}) & Q(Exact(bit, 1))
+
+
 class MotorBike(models.Model):
     TYPE_CODE = VehicleCategory.BIKE
     brand = models.ForeignKey(
@@ -99,7 +136,26 @@ class MotorBike(models.Model):
     displacement = models.IntegerField()
     years = models.ManyToManyField(Year, related_name='motorbikes', blank=True)
 
+    # `years` packed into the row (see pack_years), kept in sync by vehicles/signals.py
+    year_from = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    year_to = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    year_mask = models.BigIntegerField(default=0, editable=False)
+
     class Meta: verbose_name = 'Motor Bike'
 
     def __str__(self):
         return f"{self.brand.name} {self.displacement}"
+
+    def model_years(self) -> list[int]:
+        return unpack_years(self.year_from, self.year_mask)
+
+    def built_in(self, year: int) -> bool:
+        return self.year_from is not None and 0 <= year - self.year_from < YEAR_MASK_BITS \
+            and bool(self.year_mask >> (year - self.year_from) & 1)
+
+    def sync_years(self):
+        """Re-pack `years` after the M2M changed."""
+        packed = pack_years(self.years.values_list('value', flat=True))
+        if packed != (self.year_from, self.year_to, self.year_mask):
+            self.year_from, self.year_to, self.year_mask = packed
+            self.save(update_fields=['year_from', 'year_to', 'year_mask'])
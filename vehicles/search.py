@@ -0,0 +1,183 @@
+# vehicles/search.py
+"""
+Free-text vehicle search ("golf 1.9 tdi 77kw", "honda cbr 600 2002") over the
+in-process vehicle directory.
+
+Every car, commercial vehicle and motorbike gets a bag of tokens (brand, model and
+type name words, kW/CV, displacement). Tokens are kept sorted, so each query word
+is matched as a prefix with a bisect; the posting sets of all query words are then
+intersected and ranked by how many words matched a whole token. Four-digit years
+additionally match vehicles built in that year.
+When the directory version changes a new index is built in a background thread;
+searches keep using the previous one until it is ready, so no request pays for the
+rebuild (only the very first search in a process builds inline).
+"""
+import datetime
+import functools
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from .choices import VehicleCategory
+from .directory import get_directory
+from .serializers import month_year
+
+TOKEN_RE = re.compile(r'[0-9a-z]+(?:\.[0-9]+)*')
+# unit words carry no information on their own ("77 kw" == "77")
+UNIT_WORDS = frozenset({'kw', 'cv', 'hp', 'ps', 'cc'})
+MAX_WORDS = 8
+
+
+def tokenize(text) -> list[str]:
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode().lower()
+    return TOKEN_RE.findall(text.replace(',', '.'))
+
+
+class VehicleSearchIndex:
+    """
+    Prefix index over one VehicleDirectory. Entries are (vehicle_type, record) pairs
+    in display order (brand, model, type name or displacement), addressed by their
+    position in self.entries, so among equally scored matches the lowest position wins.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        this_year = datetime.date.today().year
+        words = functools.lru_cache(maxsize=None)(tokenize)  # brand/model names repeat a lot
+
+        entries = []
+        for code, records in ((VehicleCategory.CAR, directory.cars), (VehicleCategory.CV, directory.cvs)):
+            for t in records.values():
+                brand, model = directory.brands.get(t.brand_id), directory.models.get(t.model_id)
+                if brand is not None and model is not None:
+                    entries.append(((brand.name, model.name, t.name, 0, t.id), code, t, brand, model))
+        for b in directory.bikes.values():
+            brand, model = directory.brands.get(b.brand_id), directory.models.get(b.model_id)
+            if brand is not None and model is not None:
+                entries.append(((brand.name, model.name, '', b.displacement, b.id), VehicleCategory.BIKE, b, brand, model))
+        entries.sort(key=lambda e: e[0])
+
+        self.entries = []
+        self.years = []  # (first, last) production year per entry, or the set of years for bikes
+        postings = {}
+        for n, (_, code, record, brand, model) in enumerate(entries):
+            self.entries.append((code, record))
+            if code == VehicleCategory.BIKE:
+                self.years.append(frozenset(record.years))
+                tokens = (*words(brand.name), *words(model.name), str(record.displacement), f"{record.displacement}cc")
+            else:
+                self.years.append((record.date_start.year if record.date_start else 0,
+                                   record.date_end.year if record.date_end else this_year))
+                tokens = (*words(brand.name), *words(model.name), *words(record.name),
+                          str(record.kw), f"{record.kw}kw", str(record.cv), f"{record.cv}cv", f"{record.cv}hp")
+            for token in tokens:
+                postings.setdefault(token, set()).add(n)
+
+        self.tokens = sorted(postings)
+        self.postings = [postings[token] for token in self.tokens]
+        self._exact = postings
+
+    def _matches(self, word) -> set[int]:
+        # single characters only match whole tokens, or "1" would pull in every number
+        if len(word) == 1:
+            return self._exact.get(word, set())
+        i = bisect_left(self.tokens, word)
+        matches = set()
+        while i < len(self.tokens) and self.tokens[i].startswith(word):
+            matches.update(self.postings[i])
+            i += 1
+        return matches
+
+    def _built_in(self, n, year) -> bool:
+        years = self.years[n]
+        if isinstance(years, frozenset):
+            return year in years
+        return years[0] <= year <= years[1]
+
+    def search(self, query, limit=20) -> list[dict]:
+        words = [w for w in dict.fromkeys(tokenize(query)) if w not in UNIT_WORDS][:MAX_WORDS]
+        if not words or limit < 1:
+            return []
+        years = {w: int(w) for w in words if len(w) == 4 and w.isdigit() and 1900 <= int(w) <= 2100}
+        text_words = [w for w in words if w not in years]
+
+        if text_words:
+            # smallest match set first keeps the running intersection small
+            matched = sorted((self._matches(w) for w in text_words), key=len)
+            candidates = matched[0].intersection(*matched[1:])
+        else:
+            candidates = set(range(len(self.entries)))
+        year_filters = [(self._matches(w), year) for w, year in years.items()]
+
+        # score = number of query words matching a whole token; at_least[k] holds the
+        # candidates with k or more such words
+        at_least = [candidates] + [set() for _ in text_words]
+        for i, word in enumerate(text_words):
+            exact = self._exact.get(word, set())
+            for k in range(i + 1, 0, -1):
+                at_least[k] = at_least[k] | (at_least[k - 1] & exact)
+
+        found = []
+        for k in range(len(text_words), -1, -1):
+            tier = at_least[k] - at_least[k + 1] if k < len(text_words) else at_least[k]
+            if not year_filters:
+                found += heapq.nsmallest(limit - len(found), tier)
+            else:
+                for n in sorted(tier):
+                    if all(n in text or self._built_in(n, year) for text, year in year_filters):
+                        found.append(n)
+                        if len(found) == limit:
+                            break
+            if len(found) >= limit:
+                break
+        return [self._result(n) for n in found]
+
+    def _result(self, n) -> dict:
+        code, record = self.entries[n]
+        brand = self.directory.brands[record.brand_id]
+        model = self.directory.models[record.model_id]
+        row = {'vehicle_type': code, 'id': record.id, 'brand': brand.id, 'brand_name': brand.name,
+               'model': model.id, 'model_name': model.name}
+        if code == VehicleCategory.BIKE:
+            row.update(displacement=record.displacement, years=list(record.years),
+                       label=f"{brand.name} {model.name} {record.displacement} cc")
+        else:
+            start, end = month_year(record.date_start, '?'), month_year(record.date_end, 'now')
+            row.update(name=record.name, kw=record.kw, cv=record.cv, date_start=start, date_end=end,
+                       label=f"{brand.name} {model.name} {record.name} {record.kw}kw {record.cv}cv {start} - {end}")
+        return row
+
+
+_index: VehicleSearchIndex | None = None
+_build_lock = threading.Lock()
+_building = False
+
+
+def _build_in_background(directory):
+    global _index, _building
+    try:
+        _index = VehicleSearchIndex(directory)
+    finally:
+        with _build_lock:
+            _building = False
+
+
+def get_search_index() -> VehicleSearchIndex:
+    """
+    The index of the current directory, or of the previous one while the new index
+    is being built.
+    """
+    global _index, _building
+    directory = get_directory()
+    index = _index
+    if index is None:
+        index = _index = VehicleSearchIndex(directory)
+    elif index.directory is not directory:
+        with _build_lock:
+            start, _building = not _building, True
+        if start:
+            threading.Thread(target=_build_in_background, args=(directory,),
+                             name="vehicle-search-index", daemon=True).start()
+    return index
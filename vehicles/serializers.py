@@ -49,7 +49,23 @@ class CVSerializer(serializers.ModelSerializer):
         return data
 
 class MotorBikeSerializer(serializers.ModelSerializer):
-    years = serializers.SlugRelatedField(many=True, read_only=True, slug_field='value')
+    # read from the packed year columns, not the M2M (one query per bike)
+    years = serializers.SerializerMethodField()
+
+    def get_years(self, obj):
+        return obj.model_years()
+
     class Meta:
         model = MotorBike
         fields = ['id', 'brand', 'model', 'displacement', 'years']
+
+
+# ---------- date formatting without a serializer ----------
+
+def month_year(value, fallback):
+    """
+    A date as the selector shows it ("%m/%y"), or fallback ("?"/"now") when unknown.
+    Same output as DateField(format="%m/%y") without going through strftime; used where
+    rows are read with values() (vehicle directory, search, reverse fitment).
+    """
+    return f"{value.month:02d}/{value.year % 100:02d}" if value else fallback
@@ -0,0 +1,29 @@
+# vehicles/signals.py
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from .directory import schedule_snapshot
+from .models import Brand, Model, Car, CommercialVehicle, MotorBike
+
+
+def motorbike_years_changed(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        instance.sync_years()
+        return
+    # Year.motorbikes.add(...): instance is the Year, pk_set the bikes (None on clear)
+    if pk_set is not None:
+        bikes = MotorBike.objects.filter(pk__in=pk_set)
+    else:
+        bikes = MotorBike.objects.filter(year_from__lte=instance.value, year_to__gte=instance.value)
+    for bike in bikes:
+        bike.sync_years()
+
+
+def connect_signals():
+    for model in (Brand, Model, Car, CommercialVehicle, MotorBike):
+        post_save.connect(schedule_snapshot, sender=model, dispatch_uid=f"vehicles_{model.__name__}_saved")
+        post_delete.connect(schedule_snapshot, sender=model, dispatch_uid=f"vehicles_{model.__name__}_deleted")
+    # before the snapshot handler, so the snapshot sees the packed years
+    m2m_changed.connect(motorbike_years_changed, sender=MotorBike.years.through, dispatch_uid="vehicles_motorbike_pack_years")
+    m2m_changed.connect(schedule_snapshot, sender=MotorBike.years.through, dispatch_uid="vehicles_motorbike_years")
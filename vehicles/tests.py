@@ -1,3 +1,101 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .choices import VehicleCategory
+from .directory import VehicleDirectory
+from .models import YEAR_MASK_BITS, pack_years, unpack_years
+from .search import VehicleSearchIndex, tokenize
+from .serializers import month_year
+
+
+class MonthYearTests(SimpleTestCase):
+    def test_formats_like_the_date_field(self):
+        self.assertEqual(month_year(datetime.date(2004, 3, 1), '?'), '03/04')
+        self.assertEqual(month_year(datetime.date(1999, 12, 31), '?'), '12/99')
+        self.assertEqual(month_year(datetime.date(2000, 1, 15), 'now'), '01/00')
+
+    def test_missing_date_uses_the_fallback(self):
+        self.assertEqual(month_year(None, '?'), '?')
+        self.assertEqual(month_year(None, 'now'), 'now')
+
+
+class PackYearsTests(SimpleTestCase):
+    def test_round_trip(self):
+        years = [1999, 2000, 2001, 2004]
+        year_from, year_to, mask = pack_years(years)
+        self.assertEqual((year_from, year_to, mask), (1999, 2004, 0b100111))
+        self.assertEqual(unpack_years(year_from, mask), years)
+
+    def test_unsorted_and_repeated_years(self):
+        self.assertEqual(pack_years([2003, 2001, 2003]), (2001, 2003, 0b101))
+
+    def test_no_years(self):
+        self.assertEqual(pack_years([]), (None, None, 0))
+        self.assertEqual(unpack_years(None, 0), [])
+
+    def test_years_past_the_mask_are_dropped(self):
+        last = 1950 + YEAR_MASK_BITS - 1
+        year_from, year_to, mask = pack_years([1950, last, last + 1])
+        self.assertEqual((year_from, year_to), (1950, last))
+        self.assertEqual(unpack_years(year_from, mask), [1950, last])
+
+
+def _directory():
+    return VehicleDirectory({
+        'version': 'test',
+        'generated_at': '2026-01-01T00:00:00+00:00',
+        'brands': [[1, 'VOLKSWAGEN', 'c'], [2, 'AUDI', 'c'], [3, 'HONDA', 'b']],
+        'models': [[10, 1, 'GOLF IV', '1997-08-01', '2005-06-01'], [11, 2, 'A4', '2000-11-01', None],
+                   [12, 3, 'CBR', None, None]],
+        'cars': [[100, 1, 10, '1.9 TDI', 66, 90, '1997-08-01', '2005-06-01'],
+                 [101, 1, 10, '1.9 TDI', 77, 105, '1999-01-01', '2005-06-01'],
+                 [102, 2, 11, '1.9 TDIE', 96, 130, '2000-11-01', None]],
+        'cvs': [],
+        'bikes': [[300, 3, 12, 600, [1999, 2000, 2001]], [301, 3, 12, 900, [2002]]],
+    })
+
+
+class VehicleSearchIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = VehicleSearchIndex(_directory())
+
+    def ids(self, query, **kwargs):
+        return [row['id'] for row in self.index.search(query, **kwargs)]
+
+    def test_tokenize_keeps_decimals_and_folds_accents(self):
+        self.assertEqual(tokenize('Škoda 1,9 TDI'), ['skoda', '1.9', 'tdi'])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.ids('golf 1.9 tdi 77kw'), [101])
+        self.assertEqual(self.ids('golf 130'), [])
+
+    def test_words_match_as_prefixes(self):
+        self.assertEqual(self.ids('volks gol'), [100, 101])
+
+    def test_whole_token_matches_rank_first(self):
+        # the Audi comes first in display order, but "tdi" only prefixes its "tdie"
+        self.assertEqual(self.ids('1.9 tdi'), [100, 101, 102])
+
+    def test_unit_words_are_ignored(self):
+        self.assertEqual(self.ids('tdi 96 kw'), [102])
+
+    def test_year_filters_by_production_period(self):
+        self.assertEqual(self.ids('tdi 1998'), [100])
+        self.assertEqual(self.ids('honda 2002'), [301])
+
+    def test_result_rows(self):
+        car, = self.index.search('a4 tdi')
+        self.assertEqual(car['vehicle_type'], VehicleCategory.CAR)
+        self.assertEqual((car['brand_name'], car['model_name'], car['date_start'], car['date_end']),
+                         ('AUDI', 'A4', '11/00', 'now'))
+        bike, = self.index.search('cbr 600')
+        self.assertEqual((bike['vehicle_type'], bike['displacement'], bike['years']),
+                         (VehicleCategory.BIKE, 600, [1999, 2000, 2001]))
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search('tdi', limit=2)), 2)
+        self.assertEqual(self.index.search('tdi', limit=0), [])
+        self.assertEqual(self.index.search('  '), [])
@@ -0,0 +1,122 @@
+# vehicles/tree.py
+"""
+Whole brand -> model -> type (or bike displacement/years) tree per vehicle type,
+for the home page selector to download once. Files are written next to the
+directory snapshot, precompressed, and named by snapshot version so they can be
+cached forever.
+"""
+import gzip
+import json
+import logging
+import os
+import threading
+
+from .choices import VehicleCategory
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip and identity are served
+    brotli = None
+
+# Content-Encoding -> file suffix, in server preference order
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+KEEP_VERSIONS = 2  # current + previous, for clients still holding the old version
+
+
+def tree_dir():
+    from .directory import snapshot_path
+    return snapshot_path().parent / 'vehicle-tree'
+
+
+def tree_path(code, version, encoding=None):
+    suffix = dict(ENCODINGS).get(encoding, '')
+    return tree_dir() / f"{code}-{version}.json{suffix}"
+
+
+def build_tree(directory, code) -> dict:
+    """
+    {"version", "vehicle_type", "brands": [[id, name, [[model_id, name, start, end, children]]]]}
+    where children are [id, name, kw, cv, start, end] types, or [id, displacement, years] bikes.
+    Dates use the same %m/%y / "?" / "now" strings as the selector APIs.
+    """
+    brands = []
+    for brand in directory.brands_by_type.get(code, []):
+        models = []
+        for m in directory.models_by_brand.get(brand.id, []):
+            row = m.as_dict()
+            if code == VehicleCategory.BIKE:
+                children = [[b.id, b.displacement, list(b.years)]
+                            for b in directory.bikes_by_model.get((brand.id, m.id), [])]
+            else:
+                children = [[t['id'], t['name'], t['kw'], t['cv'], t['date_start'], t['date_end']]
+                            for t in directory.types_for(code, brand.id, m.id)]
+            models.append([m.id, m.name, row['date_start'], row['date_end'], children])
+        brands.append([brand.id, brand.name, models])
+    return {'version': directory.version, 'vehicle_type': code, 'brands': brands}
+
+
+def tree_json(directory, code) -> bytes:
+    return json.dumps(build_tree(directory, code), separators=(',', ':')).encode('utf-8')
+
+
+def _write(path, data: bytes):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_trees(directory):
+    """
+    Write <type>-<version>.json plus .gz/.br for every vehicle type, then prune old versions.
+    """
+    tree_dir().mkdir(parents=True, exist_ok=True)
+    for code in VehicleCategory.values:
+        raw = tree_json(directory, code)
+        _write(tree_path(code, directory.version, 'gzip'), gzip.compress(raw, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(tree_path(code, directory.version, 'br'), brotli.compress(raw, quality=11))
+        # identity last: its presence marks the version as complete
+        _write(tree_path(code, directory.version), raw)
+    _prune(directory.version)
+
+
+def _prune(current_version):
+    for code in VehicleCategory.values:
+        plain = sorted(tree_dir().glob(f"{code}-*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        stale = [p for p in plain if not p.name.startswith(f"{code}-{current_version}.")][KEEP_VERSIONS - 1:]
+        for path in stale:
+            for _, suffix in ENCODINGS:
+                path.with_name(path.name + suffix).unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+
+
+_write_lock = threading.Lock()
+_writing = set()  # versions being written in the background
+
+
+def _write_in_background(directory):
+    try:
+        write_trees(directory)
+    except OSError:
+        logger.exception("Writing the vehicle trees for version %s failed.", directory.version)
+    finally:
+        with _write_lock:
+            _writing.discard(directory.version)
+
+
+def ensure_trees(directory) -> bool:
+    """
+    True when every tree of this version is on disk; otherwise start writing them
+    in a background thread (compression is too slow for a request) and return False.
+    """
+    if all(tree_path(code, directory.version).exists() for code in VehicleCategory.values):
+        return True
+    with _write_lock:
+        start = directory.version not in _writing
+        _writing.add(directory.version)
+    if start:
+        threading.Thread(target=_write_in_background, args=(directory,),
+                         name="vehicle-tree", daemon=True).start()
+    return False
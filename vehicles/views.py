@@ -1,12 +1,17 @@
 # vehicles/views.py
+from functools import partial, wraps
 from urllib.parse import urlparse
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import redirect
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition, require_safe
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .choices import VehicleCategory
-from .models import Brand, Model, Car, CommercialVehicle, MotorBike
-from .serializers import (
-    BrandSerializer, VehicleModelSerializer, CarSerializer, CVSerializer, MotorBikeSerializer
-)
+from .directory import get_directory
+from .search import get_search_index
+from .tree import ENCODINGS, tree_path, tree_json, ensure_trees
 
 def check_access(request):
     if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
@@ -14,6 +19,12 @@ def check_access(request):
     referer = request.META.get('HTTP_REFERER')
     return bool(referer and urlparse(referer).netloc == request.get_host())
 
+def parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
 @api_view(['GET'])
 def get_brands(request):
     # if not check_access(request): return Response({"error":"Access denied."}, status=403)
@@ -23,45 +34,38 @@ def get_brands(request):
     if not code:
         return Response({"error": "Invalid or missing Vehicle-Type."}, status=400)
 
-    brands = Brand.objects.filter(vehicle_type=code).order_by('name')
-    return Response(BrandSerializer(brands, many=True).data)
+    return Response(get_directory().brands_for(code))
 
 @api_view(['GET'])
 def get_models(request):
     # if not check_access(request): return Response({"error":"Access denied."}, status=403)
 
-    brand_id = request.headers.get('Brand-Id')
+    brand_id = parse_id(request.headers.get('Brand-Id'))
     raw = request.headers.get('Vehicle-Type')
     code = VehicleCategory.parse(raw)
     if not brand_id or not code:
         return Response({"error": "Invalid or missing Brand-Id or Vehicle-Type."}, status=400)
 
-    qs = Model.objects.filter(brand__vehicle_type=code, brand_id=brand_id).order_by('name')
-    return Response(VehicleModelSerializer(qs, many=True).data)
+    return Response(get_directory().models_for(code, brand_id))
 
 @api_view(['GET'])
 def get_types(request):
-    brand_id = request.headers.get('Brand-Id')
-    model_id = request.headers.get('Model-Id')
+    brand_id = parse_id(request.headers.get('Brand-Id'))
+    model_id = parse_id(request.headers.get('Model-Id'))
     raw = request.headers.get('Vehicle-Type')
     code = VehicleCategory.parse(raw)
     if not (brand_id and model_id and code):
         return Response({"error": "Invalid or missing Brand-Id, Model-Id or Vehicle-Type."}, status=400)
 
-    if code == VehicleCategory.CAR:
-        qs = Car.objects.filter(brand__vehicle_type=code, brand_id=brand_id, model_id=model_id).order_by('name')
-        return Response(CarSerializer(qs, many=True).data)
-
-    if code == VehicleCategory.CV:
-        qs = CommercialVehicle.objects.filter(brand__vehicle_type=code, brand_id=brand_id, model_id=model_id).order_by('name')
-        return Response(CVSerializer(qs, many=True).data)
+    if code in (VehicleCategory.CAR, VehicleCategory.CV):
+        return Response(get_directory().types_for(code, brand_id, model_id))
 
     return Response({"error": "Unsupported Vehicle-Type for this endpoint."}, status=400)
 
 @api_view(['GET'])
 def get_motorbikes(request):
-    brand_id = request.headers.get('Brand-Id')
-    model_id = request.headers.get('Model-Id')
+    brand_id = parse_id(request.headers.get('Brand-Id'))
+    model_id = parse_id(request.headers.get('Model-Id'))
     if not (brand_id and model_id):
         return Response({"error": "Invalid or missing Brand-Id or Model-Id."}, status=400)
 
@@ -70,5 +74,145 @@ def get_motorbikes(request):
     if code != VehicleCategory.BIKE:
         return Response({"error": "Vehicle-Type must be 'b' (Motor Bike)."}, status=400)
 
-    qs = MotorBike.objects.filter(brand_id=brand_id, model_id=model_id).order_by('displacement')
-    return Response(MotorBikeSerializer(qs, many=True).data)
+    return Response(get_directory().motorbikes_for(brand_id, model_id))
+
+
+# ---------- query-string variants (cacheable) ----------
+# Same data as the header-driven endpoints above, but addressed only by the URL:
+#   /api/vehicles/brands/?vehicle=c
+#   /api/vehicles/models/?vehicle=c&brand=1
+#   /api/vehicles/types/?vehicle=c&brand=1&model=10
+#   /api/vehicles/motorbikes/?brand=3&model=12
+# so browsers and reverse proxies can cache them, revalidating against the
+# vehicle directory version.
+
+def _vehicles_etag(request, *args, **kwargs):
+    return f"vehicles-{get_directory().version}"
+
+def _vehicles_last_modified(request, *args, **kwargs):
+    return get_directory().generated_at
+
+def _search_index(request):
+    # While a new index builds, searches still run on the previous directory; take the
+    # index once per request so the ETag names the directory the results come from.
+    if not hasattr(request, '_vehicle_search_index'):
+        request._vehicle_search_index = get_search_index()
+    return request._vehicle_search_index
+
+def _search_etag(request, *args, **kwargs):
+    return f"vehicles-{_search_index(request).directory.version}"
+
+def _search_last_modified(request, *args, **kwargs):
+    return _search_index(request).directory.generated_at
+
+def cacheable(view, etag_func=_vehicles_etag, last_modified_func=_vehicles_last_modified):
+    view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            patch_cache_control(response, public=True, max_age=settings.VEHICLE_API_MAX_AGE)
+        return response
+    return wrapper
+
+@cacheable
+@api_view(['GET'])
+def vehicle_brands(request):
+    code = VehicleCategory.parse(request.GET.get('vehicle'))
+    if not code:
+        return Response({"error": "Invalid or missing vehicle."}, status=400)
+
+    return Response(get_directory().brands_for(code))
+
+@cacheable
+@api_view(['GET'])
+def vehicle_models(request):
+    brand_id = parse_id(request.GET.get('brand'))
+    code = VehicleCategory.parse(request.GET.get('vehicle'))
+    if not brand_id or not code:
+        return Response({"error": "Invalid or missing brand or vehicle."}, status=400)
+
+    return Response(get_directory().models_for(code, brand_id))
+
+@cacheable
+@api_view(['GET'])
+def vehicle_types(request):
+    brand_id = parse_id(request.GET.get('brand'))
+    model_id = parse_id(request.GET.get('model'))
+    code = VehicleCategory.parse(request.GET.get('vehicle'))
+    if not (brand_id and model_id and code):
+        return Response({"error": "Invalid or missing brand, model or vehicle."}, status=400)
+
+    if code in (VehicleCategory.CAR, VehicleCategory.CV):
+        return Response(get_directory().types_for(code, brand_id, model_id))
+
+    return Response({"error": "Unsupported vehicle for this endpoint."}, status=400)
+
+@cacheable
+@api_view(['GET'])
+def vehicle_motorbikes(request):
+    brand_id = parse_id(request.GET.get('brand'))
+    model_id = parse_id(request.GET.get('model'))
+    if not (brand_id and model_id):
+        return Response({"error": "Invalid or missing brand or model."}, status=400)
+
+    return Response(get_directory().motorbikes_for(brand_id, model_id))
+
+@partial(cacheable, etag_func=_search_etag, last_modified_func=_search_last_modified)
+@api_view(['GET'])
+def search_vehicles(request):
+    """
+    ?q=golf 1.9 tdi 77kw  ->  best matching cars, commercial vehicles and motorbikes.
+    """
+    limit = min(parse_id(request.GET.get('limit')) or 20, 50)
+    return Response(_search_index(request).search(request.GET.get('q', ''), limit=limit))
+
+
+def accepted_encodings(request):
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.lower())
+    return accepted
+
+@require_safe
+def get_vehicle_tree(request, vehicle_type, version=None):
+    """
+    Whole selector tree for one vehicle type (see vehicles/tree.py), served from
+    precompressed files. Versioned URLs never change, so they are cached as immutable;
+    the unversioned URL redirects to the current version.
+    """
+    code = VehicleCategory.parse(vehicle_type)
+    if not code:
+        raise Http404("Unknown vehicle type.")
+
+    directory = get_directory()
+    if version is None:
+        response = redirect('get_vehicle_tree', vehicle_type=code, version=directory.version)
+        response['Cache-Control'] = 'no-cache'
+        return response
+    if version == directory.version and not ensure_trees(directory):
+        # the files are being written in the background; send this one uncompressed and uncached
+        response = HttpResponse(tree_json(directory, code), content_type='application/json')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    path = tree_path(code, version)
+    if not path.exists():
+        raise Http404("Unknown vehicle tree version.")
+
+    accepted = accepted_encodings(request)
+    for encoding, _ in ENCODINGS:
+        encoded = tree_path(code, version, encoding)
+        if encoding in accepted and encoded.exists():
+            response = FileResponse(encoded.open('rb'), content_type='application/json')
+            response['Content-Encoding'] = encoding
+            break
+    else:
+        response = FileResponse(path.open('rb'), content_type='application/json')
+
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response